@@ -19,6 +19,17 @@ Usage:
     # Connect to signals for results
     client.detection_complete.connect(_on_detection_complete)
     client.comparison_complete.connect(_on_comparison_complete)
+
+    # Or let the server push a result whenever the board changes
+    # (at most 5 per second; also arrives via detection_complete)
+    client.subscribe(5.0)
+
+    # Receive only what changed since the previous state (smaller messages,
+    # only new components are parsed); applied here, signals are unchanged
+    client.enable_delta()
+
+    # Binary frames instead of JSON lines for detection results
+    client.enable_binary()
 """
 
 # Signals
@@ -34,11 +45,30 @@ var host: String = "localhost"
 var port: int = 9876
 var _socket: StreamPeerTCP
 var _connected: bool = false
-var _buffer: String = ""
+var _buffer: PackedByteArray = PackedByteArray()
 
 # Pending requests
 var _pending_callback: Callable
 
+# Delta mode: components by stable id, as of state _state_seq
+var _live_components: Dictionary = {}
+var _state_seq: int = -1
+var _resync_pending: bool = false
+
+# Binary framing (negotiated with enable_binary): wire code tables from the server
+var _binary: bool = false
+var _wire_types: Array = []
+var _wire_columns: Array = []
+var _wire_qualities: Array = []
+
+# Binary frame layout (see detection_server.py)
+const FRAME_HEADER_SIZE: int = 5      # uint32 payload length, uint8 frame type
+const FRAME_JSON: int = 0
+const FRAME_CIRCUIT: int = 1
+const CIRCUIT_HEADER_SIZE: int = 33
+const CIRCUIT_DELTA: int = 1
+const WIRE_RECORD_SIZE: int = 8
+
 # ============================================================================
 # LIFECYCLE
 # ============================================================================
@@ -64,19 +94,43 @@ func _process(_delta: float) -> void:
 	# Read available data
 	var available = _socket.get_available_bytes()
 	if available > 0:
-		var data = _socket.get_string(available)
-		_buffer += data
-		_process_buffer()
+		var received = _socket.get_data(available)
+		if received[0] == OK:
+			_buffer.append_array(received[1])
+			_process_buffer()
 
 func _process_buffer() -> void:
-	# Process complete JSON messages (newline-delimited)
-	while "\n" in _buffer:
-		var idx = _buffer.find("\n")
-		var line = _buffer.substr(0, idx)
-		_buffer = _buffer.substr(idx + 1)
-
-		if line.strip_edges().length() > 0:
-			_handle_response(line)
+	# Process complete messages: newline-delimited JSON, or length-prefixed
+	# frames once binary framing is on. The mode switches mid-stream (right
+	# after the ping reply), so it is checked per message.
+	var start = 0
+	while start < _buffer.size():
+		if _binary:
+			if _buffer.size() - start < FRAME_HEADER_SIZE:
+				break
+			var end = start + FRAME_HEADER_SIZE + _buffer.decode_u32(start)
+			if _buffer.size() < end:
+				break
+			var frame_type = _buffer[start + 4]
+			var payload = _buffer.slice(start + FRAME_HEADER_SIZE, end)
+			start = end
+
+			if frame_type == FRAME_CIRCUIT:
+				_handle_circuit_frame(payload)
+			else:
+				_handle_response(payload.get_string_from_utf8())
+		else:
+			var idx = _buffer.find(10, start)  # "\n"
+			if idx < 0:
+				break
+			var line = _buffer.slice(start, idx).get_string_from_utf8()
+			start = idx + 1
+
+			if line.strip_edges().length() > 0:
+				_handle_response(line)
+
+	if start > 0:
+		_buffer = _buffer.slice(start)
 
 # ============================================================================
 # CONNECTION
@@ -145,6 +199,11 @@ func disconnect_from_server() -> void:
 
 func _handle_disconnect() -> void:
 	_connected = false
+	# A new connection starts in JSON mode
+	_buffer.clear()
+	_binary = false
+	_live_components.clear()
+	_state_seq = -1
 	disconnected.emit()
 
 func is_connected_to_server() -> bool:
@@ -196,6 +255,50 @@ func compare(expected_circuit: Dictionary) -> void:
 		"expected": expected_circuit
 	})
 
+func subscribe(max_rate: float = 5.0) -> void:
+	"""
+	Have the server push detections whenever the components on the board change.
+
+	Args:
+		max_rate: Most pushes per second; changes in between are coalesced
+
+	Results emitted via detection_complete signal.
+	"""
+	_send_command({"command": "subscribe", "max_rate": max_rate})
+
+func unsubscribe() -> void:
+	"""Stop pushed detections."""
+	_send_command({"command": "unsubscribe"})
+
+func enable_delta(enabled: bool = true) -> void:
+	"""
+	Have the server send circuit_state as diffs against the previous state.
+
+	The first state after enabling is a full snapshot. Diffs are applied
+	here, so detection_complete / comparison_complete still carry the full
+	component list. Components keep their DetectedComponent object (and
+	id) while they stay on the board, so a moved component updates in place.
+	"""
+	_live_components.clear()
+	_state_seq = -1
+	_resync_pending = false
+	_send_command({"command": "configure", "delta": enabled})
+
+func enable_binary() -> void:
+	"""
+	Negotiate binary framing (protocol 3) via ping.
+
+	Detection results then arrive as fixed-layout binary records and are
+	decoded without JSON parsing; other responses are JSON inside binary
+	frames. Signals are unchanged.
+	"""
+	_send_command({"command": "ping", "framing": "binary"})
+
+func resync() -> void:
+	"""Request a full circuit_state snapshot (delta mode)."""
+	_resync_pending = true
+	_send_command({"command": "resync"})
+
 func get_status() -> void:
 	"""Get server/pipeline status."""
 	_send_command({"command": "status"})
@@ -237,17 +340,165 @@ func _handle_response(json_str: String) -> void:
 
 	var data = response.get("data", {})
 
+	if response.get("command") == "ping" and data.has("framing"):
+		_set_framing(data)
+
+	# Delta mode states carry a sequence number
+	var state: CircuitState = null
+	if data.has("circuit_state") and data["circuit_state"].has("seq"):
+		state = _apply_circuit_state(data["circuit_state"])
+		if state == null:
+			return  # Out of step - waiting for the resync snapshot
+
 	# Route response based on content
 	if data.has("circuit_state") and data.has("comparison"):
 		# Compare result
-		var result = ComparisonResult.from_dict(data)
+		var result = ComparisonResult.from_dict(data, state)
 		comparison_complete.emit(result)
 	elif data.has("circuit_state"):
 		# Detection result
-		var result = DetectionResult.from_dict(data)
+		var result = DetectionResult.from_dict(data, state)
 		detection_complete.emit(result)
 	# Other responses (status, configure, etc.) - could add more signals
 
+func _apply_circuit_state(data: Dictionary) -> CircuitState:
+	"""Apply a delta-mode JSON circuit_state (snapshot or diff)."""
+	var delta = data.get("delta", false)
+	var added = []
+	for comp_data in data.get("added" if delta else "components", []):
+		added.append(DetectedComponent.from_dict(comp_data))
+	var moved = []
+	for move in data.get("moved", []):
+		moved.append(DetectedComponent.from_dict(move))
+	return _apply_changes(int(data.get("seq", -1)), int(data.get("base", -1)), delta,
+		added, moved, data.get("removed", []), data.get("confidence", 0.0))
+
+func _apply_changes(seq: int, base: int, delta: bool, added: Array, moved: Array,
+		removed: Array, confidence: float) -> CircuitState:
+	"""
+	Apply a delta-mode state (snapshot or diff) to the live components.
+
+	Returns null, after requesting a resync, if a diff does not follow the
+	state held here.
+	"""
+	if delta:
+		if base != _state_seq:
+			if not _resync_pending:
+				resync()
+			return null
+		for comp_id in removed:
+			_live_components.erase(int(comp_id))
+		for move in moved:
+			var comp = _live_components.get(move.id)
+			if comp:
+				comp.move_to(move)
+	else:
+		_live_components.clear()
+		_resync_pending = false
+
+	for comp in added:
+		_live_components[comp.id] = comp
+	_state_seq = seq
+
+	var state = CircuitState.new()
+	state.confidence = confidence
+	state.components = []
+	for comp in _live_components.values():
+		state.components.append(comp)
+	return state
+
+# ============================================================================
+# BINARY FRAMING
+# ============================================================================
+
+func _set_framing(data: Dictionary) -> void:
+	"""
+	Apply the framing confirmed in a ping reply (takes effect right after it).
+
+	Every ping reply names the framing, but only the reply to a binary
+	request carries the code tables - keep the ones we have otherwise.
+	"""
+	_binary = data.get("framing") == "binary"
+	if data.has("types"):
+		_wire_types = data.get("types", [])
+		_wire_columns = data.get("columns", [])
+		_wire_qualities = data.get("qualities", [])
+
+func _handle_circuit_frame(frame: PackedByteArray) -> void:
+	"""Decode a detection result frame and emit detection_complete."""
+	if frame.size() < CIRCUIT_HEADER_SIZE:
+		error.emit("Truncated circuit frame")
+		return
+
+	var flags = frame[0]
+	var seq = frame.decode_u32(1)
+	var base = frame.decode_u32(5)
+	var confidence = frame[10] / 255.0
+	var component_count = frame.decode_u16(11)
+	var moved_count = frame.decode_u16(13)
+	var removed_count = frame.decode_u16(15)
+
+	var offset = CIRCUIT_HEADER_SIZE
+	if frame.size() < offset + (component_count + moved_count) * WIRE_RECORD_SIZE + removed_count * 2:
+		error.emit("Truncated circuit frame")
+		return
+
+	var components = []
+	for i in component_count:
+		components.append(_decode_component(frame, offset))
+		offset += WIRE_RECORD_SIZE
+	var moved = []
+	for i in moved_count:
+		moved.append(_decode_component(frame, offset))
+		offset += WIRE_RECORD_SIZE
+	var removed = []
+	for i in removed_count:
+		removed.append(frame.decode_u16(offset))
+		offset += 2
+
+	var state: CircuitState
+	if seq == 0:
+		# Delta mode off: a standalone full state
+		state = CircuitState.new()
+		state.confidence = confidence
+		state.components = []
+		for comp in components:
+			state.components.append(comp)
+	else:
+		state = _apply_changes(seq, base, (flags & CIRCUIT_DELTA) != 0,
+			components, moved, removed, confidence)
+		if state == null:
+			return  # Out of step - waiting for the resync snapshot
+
+	var result = DetectionResult.new()
+	result.circuit_state = state
+	result.quality = _wire_name(_wire_qualities, frame[9], "unknown")
+	result.timing = {
+		"capture_ms": frame.decode_float(17),
+		"inference_ms": frame.decode_float(21),
+		"mapping_ms": frame.decode_float(25),
+		"total_ms": frame.decode_float(29),
+	}
+	detection_complete.emit(result)
+
+func _decode_component(frame: PackedByteArray, offset: int) -> DetectedComponent:
+	"""One fixed-layout component record (id, type, legs, confidence)."""
+	var comp = DetectedComponent.new()
+	comp.id = frame.decode_u16(offset)
+	comp.type = _wire_name(_wire_types, frame[offset + 2], "unknown")
+	comp.leg1_row = frame[offset + 3]
+	comp.leg1_col = _wire_name(_wire_columns, frame[offset + 4], "a")
+	comp.leg2_row = frame[offset + 5]
+	comp.leg2_col = _wire_name(_wire_columns, frame[offset + 6], "")
+	comp.confidence = frame[offset + 7] / 255.0
+	return comp
+
+func _wire_name(table: Array, code: int, fallback: String) -> String:
+	"""Name for a wire code; code 0 / unknown codes give the fallback."""
+	if code <= 0 or code >= table.size():
+		return fallback
+	return table[code]
+
 # ============================================================================
 # DATA CLASSES
 # ============================================================================
@@ -257,9 +508,9 @@ class DetectionResult:
 	var timing: Dictionary
 	var quality: String
 
-	static func from_dict(data: Dictionary) -> DetectionResult:
+	static func from_dict(data: Dictionary, state: CircuitState = null) -> DetectionResult:
 		var result = DetectionResult.new()
-		result.circuit_state = CircuitState.from_dict(data.get("circuit_state", {}))
+		result.circuit_state = state if state else CircuitState.from_dict(data.get("circuit_state", {}))
 		result.timing = data.get("timing", {})
 		result.quality = data.get("quality", "unknown")
 		return result
@@ -274,9 +525,9 @@ class ComparisonResult:
 	var missing_count: int
 	var extra_count: int
 
-	static func from_dict(data: Dictionary) -> ComparisonResult:
+	static func from_dict(data: Dictionary, state: CircuitState = null) -> ComparisonResult:
 		var result = ComparisonResult.new()
-		result.circuit_state = CircuitState.from_dict(data.get("circuit_state", {}))
+		result.circuit_state = state if state else CircuitState.from_dict(data.get("circuit_state", {}))
 		result.is_correct = data.get("is_correct", false)
 		result.score = data.get("score", 0.0)
 		result.hint = data.get("hint", "")
@@ -318,6 +569,7 @@ class CircuitState:
 		return false
 
 class DetectedComponent:
+	var id: int = -1  # Stable id in delta mode
 	var type: String
 	var leg1_row: int
 	var leg1_col: String
@@ -329,21 +581,34 @@ class DetectedComponent:
 
 	static func from_dict(data: Dictionary) -> DetectedComponent:
 		var comp = DetectedComponent.new()
+		comp.id = int(data.get("id", -1))
 		comp.type = data.get("type", "unknown")
 		comp.confidence = data.get("confidence", 0.0)
 		comp.value = data.get("value", "")
 		comp.color = data.get("color", "")
+		comp.set_legs(data.get("leg1", {}), data.get("leg2"))
+		return comp
 
-		var leg1 = data.get("leg1", {})
-		comp.leg1_row = leg1.get("row", 0)
-		comp.leg1_col = leg1.get("col", "a")
+	func set_legs(leg1, leg2) -> void:
+		if leg1 == null:
+			leg1 = {}
+		leg1_row = leg1.get("row", 0)
+		leg1_col = leg1.get("col", "a")
 
-		var leg2 = data.get("leg2")
 		if leg2:
-			comp.leg2_row = leg2.get("row", 0)
-			comp.leg2_col = leg2.get("col", "a")
-
-		return comp
+			leg2_row = leg2.get("row", 0)
+			leg2_col = leg2.get("col", "a")
+		else:
+			leg2_row = 0
+			leg2_col = ""
+
+	func move_to(other: DetectedComponent) -> void:
+		"""Take another report's legs and confidence (delta mode moves)."""
+		leg1_row = other.leg1_row
+		leg1_col = other.leg1_col
+		leg2_row = other.leg2_row
+		leg2_col = other.leg2_col
+		confidence = other.confidence
 
 	func get_position_string() -> String:
 		var pos1 = leg1_col.to_upper() + str(leg1_row)
@@ -4,8 +4,65 @@ Converts pixel coordinates from CV detection to breadboard positions (e.g., "E5"
 
 Calibration based on medium breadboard (30 rows, 10 columns a-j)
 Recalibrate when switching cameras by updating the constants below.
+
+Batch methods (pixel_to_grid_batch, map_components_batch) take NumPy arrays
+and return structured arrays - use them when mapping every detection of a frame.
+Whole-pixel points of the axis-aligned model go through per-axis lookup tables
+(built on first use after each calibration); all other points are mapped
+arithmetically.
+
+For a tilted camera, recalibrate_homography() fits a projective transform from
+known hole positions instead of the axis-aligned model.
 """
 
+import re
+
+import numpy as np
+
+# Column codes used by the batch API (index into COLUMN_NAMES, 0 = no column)
+COLUMN_NAMES = ('', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', '+L', '-L', '+R', '-R')
+_COLUMN_CODES = {name: code for code, name in enumerate(COLUMN_NAMES) if name}
+
+# Section ids used by the batch API
+SECTION_NONE = 0
+SECTION_LEFT_POWER = 1
+SECTION_LEFT_GRID = 2
+SECTION_RIGHT_GRID = 3
+SECTION_RIGHT_POWER = 4
+
+# Section of each column code
+_SECTION_OF_COLUMN = np.array(
+    [SECTION_NONE]
+    + [SECTION_LEFT_GRID] * 5
+    + [SECTION_RIGHT_GRID] * 5
+    + [SECTION_LEFT_POWER] * 2
+    + [SECTION_RIGHT_POWER] * 2,
+    dtype=np.uint8,
+)
+
+# Pixel tolerance either side of a power rail column
+RAIL_TOLERANCE = 20
+
+# Hole names accepted by recalibrate_homography(), e.g. "a1", "J30", "+L5"
+_HOLE_PATTERN = re.compile(r'^([a-jA-J]|[+-][LRlr])(\d+)$')
+
+# One mapped point (pixel_to_grid_batch)
+GRID_POINT_DTYPE = np.dtype([
+    ('row', np.int16),       # Row number 1-30, 0 if off the board
+    ('col', np.uint8),       # Index into COLUMN_NAMES, 0 if invalid
+    ('valid', np.bool_),     # True if position is on the breadboard
+    ('section', np.uint8),   # SECTION_* id
+])
+
+# One mapped component (map_components_batch)
+COMPONENT_DTYPE = np.dtype([
+    ('leg1', GRID_POINT_DTYPE),
+    ('leg2', GRID_POINT_DTYPE),
+    ('has_leg2', np.bool_),    # False for small (single position) components
+    ('spans_gap', np.bool_),   # True if legs straddle the center gap
+])
+
+
 class GridMapper:
     def __init__(self, image_width=1280, image_height=960):
         """
@@ -57,6 +114,11 @@ class GridMapper:
         self.num_rows = 30
         self.num_cols_per_side = 5
 
+        # Projective calibration (board layout -> image), None = axis-aligned
+        self._homography = None
+        self._inverse_homography = None
+        self.reprojection_errors = {}
+
         # Calculate spacing
         self._calculate_spacing()
 
@@ -66,6 +128,36 @@ class GridMapper:
         self.col_spacing_left = (self.left_grid['x_end'] - self.left_grid['x_start']) / (self.num_cols_per_side - 1)
         self.col_spacing_right = (self.right_grid['x_end'] - self.right_grid['x_start']) / (self.num_cols_per_side - 1)
 
+        self._invalidate_lookup()
+
+    def _invalidate_lookup(self):
+        """Calibration changed - lookup tables are rebuilt on next use."""
+        self._row_lut = None
+        self._col_lut = None
+
+    def _ensure_lookup(self):
+        """
+        Build the pixel -> hole lookup tables if calibration changed.
+
+        The axis-aligned model is separable, so two 1-D tables at the working
+        resolution are enough: row number per Y pixel and column code per
+        X pixel (0 = off the board).
+        """
+        if self._row_lut is not None:
+            return
+
+        ys = np.arange(self.image_height, dtype=np.float64)
+        xs = np.arange(self.image_width, dtype=np.float64)
+        self._row_lut = self._y_to_row_batch(ys).astype(np.uint8)
+        self._col_lut = self._x_to_col_batch(xs)
+        print(f"[GridMapper] Built lookup tables: {self.lookup_nbytes} bytes")
+
+    @property
+    def lookup_nbytes(self):
+        """Memory footprint of the pixel -> hole lookup tables in bytes."""
+        self._ensure_lookup()
+        return self._row_lut.nbytes + self._col_lut.nbytes
+
     def pixel_to_grid(self, x, y):
         """
         Convert pixel coordinates to breadboard position.
@@ -81,97 +173,183 @@ class GridMapper:
                 - 'col': Column letter or power rail indicator
                 - 'valid': Boolean if position is on the breadboard
         """
-        result = {'position': None, 'row': None, 'col': None, 'valid': False}
+        return self._point_to_dict(self.pixel_to_grid_batch([x], [y])[0])
 
-        # Calculate row from Y coordinate
-        row = self._y_to_row(y)
-        if row is None:
-            return result
+    def pixel_to_grid_batch(self, xs, ys):
+        """
+        Convert many pixel coordinates to breadboard positions in one pass.
 
-        result['row'] = row
+        Args:
+            xs: Array-like of pixel X coordinates
+            ys: Array-like of pixel Y coordinates (same length as xs)
 
-        # Check which section the X coordinate falls into
+        Returns:
+            Structured array (GRID_POINT_DTYPE) with one record per point:
+                - 'row': Row number (1-30), 0 if off the board vertically
+                - 'col': Column code, index into COLUMN_NAMES (0 if invalid)
+                - 'valid': Boolean if position is on the breadboard
+                - 'section': SECTION_* id of the matched column
+        """
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
 
-        # Left power rails
-        if self._in_range(x, self.left_power['positive_x'] - 20, self.left_power['positive_x'] + 20):
-            result['col'] = '+L'
-            result['position'] = f"+L{row}"
-            result['valid'] = True
-            return result
+        rows, cols = self._lookup_rows_cols(xs, ys)
+        cols[rows == 0] = 0
 
-        if self._in_range(x, self.left_power['negative_x'] - 20, self.left_power['negative_x'] + 20):
-            result['col'] = '-L'
-            result['position'] = f"-L{row}"
-            result['valid'] = True
-            return result
+        result = np.zeros(rows.shape, dtype=GRID_POINT_DTYPE)
+        result['row'] = rows
+        result['col'] = cols
+        result['valid'] = cols != 0
+        result['section'] = _SECTION_OF_COLUMN[cols]
+        return result
 
-        # Left grid (a-e)
-        col = self._x_to_col_left(x)
-        if col:
-            result['col'] = col
-            result['position'] = f"{col.upper()}{row}"
-            result['valid'] = True
-            return result
+    def _lookup_rows_cols(self, xs, ys):
+        """
+        Map pixels to (row, column code), through the lookup tables where exact.
+
+        The tables hold the exact result for every whole pixel, so only
+        whole-pixel points inside the working resolution use them.
+        Sub-pixel points (which can fall on the other side of a hole
+        boundary than their nearest whole pixel - detection boxes nearly
+        always are sub-pixel), points outside the frame and homography
+        calibrations (not separable per axis) use the arithmetic mapping.
+        """
+        if self._homography is not None:
+            return self._map_arithmetic(xs, ys)
+        tabled = ((xs >= 0) & (xs < self.image_width) & (xs == np.floor(xs)) &
+                  (ys >= 0) & (ys < self.image_height) & (ys == np.floor(ys)))
+
+        if tabled.all():
+            return self._lookup_in_frame(xs.astype(np.intp), ys.astype(np.intp))
+
+        rows, cols = self._map_arithmetic(xs, ys)
+        if tabled.any():
+            rows[tabled], cols[tabled] = self._lookup_in_frame(
+                xs[tabled].astype(np.intp), ys[tabled].astype(np.intp))
+        return rows, cols
+
+    def _lookup_in_frame(self, xi, yi):
+        """Index the lookup tables with whole-pixel coordinates."""
+        self._ensure_lookup()
+        return self._row_lut[yi].astype(np.int16), self._col_lut[xi]
+
+    def _map_arithmetic(self, xs, ys):
+        """Map pixels to (row, column code) without the lookup tables."""
+        if self._homography is not None:
+            xs, ys = self.image_to_board(xs, ys)
+        return self._y_to_row_batch(ys), self._x_to_col_batch(xs)
+
+    def image_to_board(self, xs, ys):
+        """
+        Map image pixels into the axis-aligned board layout.
 
-        # Right grid (f-j)
-        col = self._x_to_col_right(x)
-        if col:
-            result['col'] = col
-            result['position'] = f"{col.upper()}{row}"
-            result['valid'] = True
-            return result
+        Identity unless a homography calibration is active.
+        """
+        if self._inverse_homography is None:
+            return xs, ys
+        return _apply_homography(self._inverse_homography, xs, ys)
 
-        # Right power rails
-        if self._in_range(x, self.right_power['positive_x'] - 20, self.right_power['positive_x'] + 20):
-            result['col'] = '+R'
-            result['position'] = f"+R{row}"
-            result['valid'] = True
-            return result
+    def board_to_image(self, xs, ys):
+        """
+        Map board layout coordinates to image pixels.
+
+        Identity unless a homography calibration is active.
+        """
+        if self._homography is None:
+            return xs, ys
+        return _apply_homography(self._homography, xs, ys)
+
+    def board_bbox(self, margin=0.0):
+        """
+        Pixel bounding box of the calibrated board area.
+
+        Covers every position pixel_to_grid can report - both power rails
+        (with their tolerance) and half a hole beyond the first and last row.
 
-        if self._in_range(x, self.right_power['negative_x'] - 20, self.right_power['negative_x'] + 20):
-            result['col'] = '-R'
-            result['position'] = f"-R{row}"
-            result['valid'] = True
+        Args:
+            margin: Extra space on every side, as a fraction of the box size
+
+        Returns:
+            (x1, y1, x2, y2) integer pixels, clipped to the image
+        """
+        rails_x = [self.left_power['positive_x'], self.left_power['negative_x'],
+                   self.right_power['positive_x'], self.right_power['negative_x']]
+        grids_x = [self.left_grid['x_start'], self.left_grid['x_end'],
+                   self.right_grid['x_start'], self.right_grid['x_end']]
+        x1 = min(min(rails_x) - RAIL_TOLERANCE, min(grids_x) - self.col_spacing_left / 2)
+        x2 = max(max(rails_x) + RAIL_TOLERANCE, max(grids_x) + self.col_spacing_right / 2)
+        y1 = self.left_grid['y_start'] - self.row_spacing / 2
+        y2 = self.left_grid['y_end'] + self.row_spacing / 2
+
+        # Corners through the homography (skewed board -> enclosing box)
+        xs, ys = self.board_to_image(np.array([x1, x2, x2, x1], dtype=np.float64),
+                                     np.array([y1, y1, y2, y2], dtype=np.float64))
+        x1, x2 = float(np.min(xs)), float(np.max(xs))
+        y1, y2 = float(np.min(ys)), float(np.max(ys))
+
+        pad_x = (x2 - x1) * margin
+        pad_y = (y2 - y1) * margin
+        return (
+            max(0, int(np.floor(x1 - pad_x))),
+            max(0, int(np.floor(y1 - pad_y))),
+            min(self.image_width, int(np.ceil(x2 + pad_x))),
+            min(self.image_height, int(np.ceil(y2 + pad_y))),
+        )
+
+    def _y_to_row_batch(self, ys):
+        """Convert Y pixels to row numbers (1-30), 0 where off the board."""
+        y_start = self.left_grid['y_start']
+        on_board = ((ys >= y_start - self.row_spacing/2) &
+                    (ys <= self.left_grid['y_end'] + self.row_spacing/2))
+
+        rows = np.round((ys - y_start) / self.row_spacing) + 1
+        rows = np.clip(rows, 1, self.num_rows)
+        return np.where(on_board, rows, 0).astype(np.int16)
+
+    def _x_to_col_batch(self, xs):
+        """Convert X pixels to column codes (index into COLUMN_NAMES), 0 if none."""
+        # Check sections in the same priority order as the physical layout:
+        # left rails, left grid (a-e), right grid (f-j), right rails
+        checks = [
+            (self._rail_mask(xs, self.left_power['positive_x']), _COLUMN_CODES['+L']),
+            (self._rail_mask(xs, self.left_power['negative_x']), _COLUMN_CODES['-L']),
+            (self._grid_mask(xs, self.left_grid, self.col_spacing_left),
+             _COLUMN_CODES['a'] + self._grid_index(xs, self.left_grid, self.col_spacing_left)),
+            (self._grid_mask(xs, self.right_grid, self.col_spacing_right),
+             _COLUMN_CODES['f'] + self._grid_index(xs, self.right_grid, self.col_spacing_right)),
+            (self._rail_mask(xs, self.right_power['positive_x']), _COLUMN_CODES['+R']),
+            (self._rail_mask(xs, self.right_power['negative_x']), _COLUMN_CODES['-R']),
+        ]
+        conditions = [mask for mask, _ in checks]
+        choices = [code for _, code in checks]
+        return np.select(conditions, choices, default=0).astype(np.uint8)
+
+    def _grid_mask(self, xs, grid, spacing):
+        """Mask of X pixels within half a hole of a grid section."""
+        return (xs >= grid['x_start'] - spacing/2) & (xs <= grid['x_end'] + spacing/2)
+
+    def _grid_index(self, xs, grid, spacing):
+        """Column index (0-4) within a grid section for X pixels."""
+        col_idx = np.round((xs - grid['x_start']) / spacing)
+        return np.clip(col_idx, 0, self.num_cols_per_side - 1).astype(np.int64)
+
+    def _rail_mask(self, xs, rail_x):
+        """Mask of X pixels within tolerance of a power rail column."""
+        return (xs >= rail_x - RAIL_TOLERANCE) & (xs <= rail_x + RAIL_TOLERANCE)
+
+    def _point_to_dict(self, point):
+        """Convert one GRID_POINT_DTYPE record to the per-point dict format."""
+        row = int(point['row'])
+        result = {'position': None, 'row': row or None, 'col': None, 'valid': False}
+        if not point['valid']:
             return result
 
+        col = COLUMN_NAMES[point['col']]
+        result['col'] = col
+        result['position'] = f"{col.upper()}{row}"
+        result['valid'] = True
         return result
 
-    def _y_to_row(self, y):
-        """Convert Y pixel to row number (1-30)."""
-        if y < self.left_grid['y_start'] - self.row_spacing/2:
-            return None
-        if y > self.left_grid['y_end'] + self.row_spacing/2:
-            return None
-
-        row = round((y - self.left_grid['y_start']) / self.row_spacing) + 1
-        return max(1, min(30, row))
-
-    def _x_to_col_left(self, x):
-        """Convert X pixel to column letter (a-e)."""
-        if x < self.left_grid['x_start'] - self.col_spacing_left/2:
-            return None
-        if x > self.left_grid['x_end'] + self.col_spacing_left/2:
-            return None
-
-        col_idx = round((x - self.left_grid['x_start']) / self.col_spacing_left)
-        col_idx = max(0, min(4, col_idx))
-        return self.left_grid['columns'][col_idx]
-
-    def _x_to_col_right(self, x):
-        """Convert X pixel to column letter (f-j)."""
-        if x < self.right_grid['x_start'] - self.col_spacing_right/2:
-            return None
-        if x > self.right_grid['x_end'] + self.col_spacing_right/2:
-            return None
-
-        col_idx = round((x - self.right_grid['x_start']) / self.col_spacing_right)
-        col_idx = max(0, min(4, col_idx))
-        return self.right_grid['columns'][col_idx]
-
-    def _in_range(self, val, min_val, max_val):
-        """Check if value is in range."""
-        return min_val <= val <= max_val
-
     def map_component(self, detection):
         """
         Map a detected component to breadboard positions.
@@ -183,48 +361,65 @@ class GridMapper:
         Returns:
             Dict with component type and leg positions
         """
-        x = detection['x']
-        y = detection['y']
-        width = detection.get('width', 0)
-        height = detection.get('height', 0)
-        comp_type = detection.get('type', 'unknown')
-
-        # For small components (single position)
-        if width < self.col_spacing_left * 1.5 and height < self.row_spacing * 1.5:
-            pos = self.pixel_to_grid(x, y)
-            return {
-                'type': comp_type,
-                'leg1': pos,
-                'leg2': None,
-                'spans_gap': False
-            }
-
-        # For components that span multiple holes (LEDs, resistors, wires)
-        # Estimate leg positions at top and bottom of bounding box
-        if height > width:
-            # Vertical component (most common)
-            leg1 = self.pixel_to_grid(x, y - height/2 + 5)
-            leg2 = self.pixel_to_grid(x, y + height/2 - 5)
-        else:
-            # Horizontal component (spanning the center gap)
-            leg1 = self.pixel_to_grid(x - width/2 + 5, y)
-            leg2 = self.pixel_to_grid(x + width/2 - 5, y)
-
-        # Check if component spans the center gap
-        spans_gap = False
-        if leg1['valid'] and leg2['valid']:
-            if leg1['col'] in ['a','b','c','d','e'] and leg2['col'] in ['f','g','h','i','j']:
-                spans_gap = True
-            elif leg1['col'] in ['f','g','h','i','j'] and leg2['col'] in ['a','b','c','d','e']:
-                spans_gap = True
+        box = (detection['x'], detection['y'],
+               detection.get('width', 0), detection.get('height', 0))
+        mapped = self.map_components_batch([box])[0]
 
         return {
-            'type': comp_type,
-            'leg1': leg1,
-            'leg2': leg2,
-            'spans_gap': spans_gap
+            'type': detection.get('type', 'unknown'),
+            'leg1': self._point_to_dict(mapped['leg1']),
+            'leg2': self._point_to_dict(mapped['leg2']) if mapped['has_leg2'] else None,
+            'spans_gap': bool(mapped['spans_gap'])
         }
 
+    def map_components_batch(self, boxes):
+        """
+        Map many detected components to breadboard positions in one pass.
+
+        Args:
+            boxes: Array-like of shape (N, 4) with (x, y, width, height)
+                   per component (x, y is center of bounding box)
+
+        Returns:
+            Structured array (COMPONENT_DTYPE) with one record per component:
+                - 'leg1', 'leg2': GRID_POINT_DTYPE records
+                - 'has_leg2': False for small (single position) components
+                - 'spans_gap': Boolean if the legs straddle the center gap
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x, y, width, height = boxes.T
+        count = len(boxes)
+
+        # Small components occupy a single position at their center
+        small = (width < self.col_spacing_left * 1.5) & (height < self.row_spacing * 1.5)
+
+        # Larger components (LEDs, resistors, wires): estimate leg positions at
+        # the ends of the bounding box - top/bottom for vertical components,
+        # left/right for horizontal ones (spanning the center gap)
+        vertical = height > width
+        leg1_x = np.where(small | vertical, x, x - width/2 + 5)
+        leg1_y = np.where(small | ~vertical, y, y - height/2 + 5)
+        leg2_x = np.where(vertical, x, x + width/2 - 5)
+        leg2_y = np.where(vertical, y + height/2 - 5, y)
+
+        legs = self.pixel_to_grid_batch(np.concatenate([leg1_x, leg2_x]),
+                                        np.concatenate([leg1_y, leg2_y]))
+
+        result = np.zeros(count, dtype=COMPONENT_DTYPE)
+        result['leg1'] = legs[:count]
+        result['leg2'] = np.where(small, np.zeros((), dtype=GRID_POINT_DTYPE), legs[count:])
+        result['has_leg2'] = ~small
+
+        # Check if component spans the center gap
+        sec1 = result['leg1']['section']
+        sec2 = result['leg2']['section']
+        result['spans_gap'] = (
+            result['leg1']['valid'] & result['leg2']['valid'] &
+            (((sec1 == SECTION_LEFT_GRID) & (sec2 == SECTION_RIGHT_GRID)) |
+             ((sec1 == SECTION_RIGHT_GRID) & (sec2 == SECTION_LEFT_GRID)))
+        )
+        return result
+
     def are_connected(self, pos1, pos2):
         """
         Check if two positions are electrically connected on the breadboard.
@@ -272,6 +467,9 @@ class GridMapper:
                 - 'a30': (x, y) of hole A30
                 - 'f1': (x, y) of hole F1
                 - 'j1': (x, y) of hole J1
+                Optional power rail holes (only x is used):
+                - '+L1', '-L1': (x, y) of the left rail holes in row 1
+                - '+R1', '-R1': (x, y) of the right rail holes in row 1
         """
         if 'a1' in corners and 'e1' in corners and 'a30' in corners:
             self.left_grid['x_start'] = corners['a1'][0]
@@ -286,9 +484,142 @@ class GridMapper:
             # y_end same as left side
             self.right_grid['y_end'] = self.left_grid['y_end']
 
+        rails = [
+            ('+L1', self.left_power, 'positive_x'),
+            ('-L1', self.left_power, 'negative_x'),
+            ('+R1', self.right_power, 'positive_x'),
+            ('-R1', self.right_power, 'negative_x'),
+        ]
+        for name, rail, key in rails:
+            if name in corners:
+                rail[key] = corners[name][0]
+                rail['y_start'] = self.left_grid['y_start']
+                rail['y_end'] = self.left_grid['y_end']
+
+        # Back to the axis-aligned model
+        self._homography = None
+        self._inverse_homography = None
+        self.reprojection_errors = {}
+
         self._calculate_spacing()
         print(f"[GridMapper] Recalibrated: row_spacing={self.row_spacing:.1f}px, col_spacing={self.col_spacing_left:.1f}px")
 
+    def recalibrate_homography(self, holes):
+        """
+        Recalibrate with a projective transform fitted to known holes.
+
+        Use this when the camera is tilted and the board appears skewed.
+        The current axis-aligned layout acts as the board model: the fit maps
+        each hole's layout position to where it appears in the image, and
+        points are mapped back through the inverse transform.
+
+        Args:
+            holes: Dict of hole name -> (x, y) pixel position, e.g.
+                   {'a1': (201, 97), 'j1': (655, 92),
+                    'a30': (190, 880), 'j30': (662, 871)}
+                   At least 4 holes, no 3 of them in a line. Extra holes
+                   (including rails like '+L1') average out click error.
+
+        Returns:
+            Dict of hole name -> reprojection error in pixels
+        """
+        if len(holes) < 4:
+            raise ValueError("Homography calibration needs at least 4 holes")
+
+        names = list(holes)
+        board = np.array([self._hole_to_board(name) for name in names], dtype=np.float64)
+        image = np.array([holes[name] for name in names], dtype=np.float64)
+
+        self._homography = _fit_homography(board, image)
+        self._inverse_homography = np.linalg.inv(self._homography)
+        self._invalidate_lookup()
+
+        # Per-hole reprojection error (layout position -> image vs measured)
+        proj_x, proj_y = self.board_to_image(board[:, 0], board[:, 1])
+        errors = np.hypot(proj_x - image[:, 0], proj_y - image[:, 1])
+        self.reprojection_errors = {name: float(err) for name, err in zip(names, errors)}
+
+        print(f"[GridMapper] Homography calibrated from {len(names)} holes: "
+              f"mean error={errors.mean():.2f}px, max error={errors.max():.2f}px")
+        return self.reprojection_errors
+
+    def _hole_to_board(self, name):
+        """Position of a named hole (e.g. "a1", "+L5") in the board layout."""
+        match = _HOLE_PATTERN.match(name.strip())
+        if not match:
+            raise ValueError(f"Unknown hole name: {name!r}")
+
+        col, row = match.group(1), int(match.group(2))
+        if not 1 <= row <= self.num_rows:
+            raise ValueError(f"Row out of range in hole name: {name!r}")
+        y = self.left_grid['y_start'] + (row - 1) * self.row_spacing
+
+        rails = {
+            '+L': self.left_power['positive_x'],
+            '-L': self.left_power['negative_x'],
+            '+R': self.right_power['positive_x'],
+            '-R': self.right_power['negative_x'],
+        }
+        if len(col) == 2:
+            return rails[col.upper()], y
+
+        col = col.lower()
+        if col in self.left_grid['columns']:
+            idx = self.left_grid['columns'].index(col)
+            return self.left_grid['x_start'] + idx * self.col_spacing_left, y
+
+        idx = self.right_grid['columns'].index(col)
+        return self.right_grid['x_start'] + idx * self.col_spacing_right, y
+
+
+def _apply_homography(matrix, xs, ys):
+    """Apply a 3x3 projective transform to arrays of points."""
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    w = matrix[2, 0] * xs + matrix[2, 1] * ys + matrix[2, 2]
+    out_x = (matrix[0, 0] * xs + matrix[0, 1] * ys + matrix[0, 2]) / w
+    out_y = (matrix[1, 0] * xs + matrix[1, 1] * ys + matrix[1, 2]) / w
+    return out_x, out_y
+
+
+def _normalize_points(points):
+    """Similarity transform moving points to zero mean, mean distance sqrt(2)."""
+    mean = points.mean(axis=0)
+    dist = np.hypot(*(points - mean).T).mean()
+    scale = np.sqrt(2) / dist if dist > 0 else 1.0
+    return np.array([
+        [scale, 0, -scale * mean[0]],
+        [0, scale, -scale * mean[1]],
+        [0, 0, 1],
+    ])
+
+
+def _fit_homography(src, dst):
+    """
+    Fit a homography mapping src -> dst points (normalized DLT).
+
+    Least squares when more than 4 point pairs are given.
+    """
+    t_src = _normalize_points(src)
+    t_dst = _normalize_points(dst)
+    sx, sy = _apply_homography(t_src, src[:, 0], src[:, 1])
+    dx, dy = _apply_homography(t_dst, dst[:, 0], dst[:, 1])
+
+    zeros = np.zeros_like(sx)
+    ones = np.ones_like(sx)
+    system = np.concatenate([
+        np.column_stack([-sx, -sy, -ones, zeros, zeros, zeros, dx * sx, dx * sy, dx]),
+        np.column_stack([zeros, zeros, zeros, -sx, -sy, -ones, dy * sx, dy * sy, dy]),
+    ])
+
+    _, singular, vt = np.linalg.svd(system)
+    # A unique solution needs 8 independent equations (rank 8 of 9 unknowns)
+    if singular[7] < 1e-8 * singular[0]:
+        raise ValueError("Calibration holes are degenerate (3 or more in a line?)")
+
+    matrix = np.linalg.inv(t_dst) @ vt[-1].reshape(3, 3) @ t_src
+    return matrix / matrix[2, 2]
+
 
 # Convenience function for quick testing
 def test_mapper():
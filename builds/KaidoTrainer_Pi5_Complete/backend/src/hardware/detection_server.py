@@ -0,0 +1,1030 @@
+"""
+Detection Server for KaidoTrainer.
+
+Serves the newline-delimited JSON protocol spoken by DetectionClient.gd
+(TCP port 9876) to any number of clients at once:
+
+    -> {"command": "ping" | "start" | "stop" | "detect" | "compare" |
+                   "status" | "configure" | "subscribe" | "unsubscribe" | "quit", ...}
+    <- {"status": "ok" | "error", "command": ..., "message": ..., "data": {...}}
+
+Push mode: after {"command": "subscribe", "max_rate": 5} the server runs
+the live detection loop and pushes detect-shaped messages ("event":
+"detection") whenever the detected component set changes, at most max_rate
+per second. States that come and go between two pushes are coalesced - the
+client only ever gets the latest one.
+
+Delta mode: after {"command": "configure", "delta": true} every
+circuit_state sent on that connection carries a "seq" and components carry
+stable "id"s. The first state is a full snapshot; later ones are diffs
+against the previous state ("delta": true, "base": previous seq, "added",
+"moved", "removed"). {"command": "resync"} returns a full snapshot.
+
+Binary framing: {"command": "ping", "framing": "binary"} is answered
+(still as a JSON line) with the wire tables, and every later server
+message on that connection is a length-prefixed frame:
+
+    uint32 payload length | uint8 frame type | payload       (little-endian)
+
+    FRAME_JSON      payload is one JSON message (UTF-8)
+    FRAME_CIRCUIT   detect / push / resync result: CIRCUIT_HEADER, then
+                    (components + moved) WIRE_RECORD records, then
+                    removed ids as uint16
+
+Commands from the client stay JSON lines.
+
+Design:
+    - One RoboflowDetectionModel, loaded once and shared by every client
+    - Per connection: a reader task feeding a bounded asyncio.Queue and a
+      worker task answering commands in order. When a client sends faster
+      than it is served the queue fills, the reader stops reading, and TCP
+      flow control pushes back on that client alone
+    - Camera capture, inference and grid mapping run in a thread pool, so
+      the event loop keeps serving other clients meanwhile
+    - One camera, one board: detect requests arriving while a detection is
+      running share its result instead of queueing another inference
+    - One live loop serves every subscriber, paced by the fastest max_rate
+
+Usage:
+    server = DetectionServer(model, frame_source=camera.capture_rgb)
+    asyncio.run(server.serve_forever())
+
+    # CLI (static test image instead of a camera)
+    python -m hardware.detection_server --config config/model_config.json --image board.jpg
+
+    # JSON vs binary message size and encode time
+    python -m hardware.detection_server --benchmark
+"""
+
+import asyncio
+import json
+import random
+import struct
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from .grid_mapper import COLUMN_NAMES
+from .netlist import CONDUCTOR_TYPES, RAILS, build_netlist, component_type_name
+from .roboflow_model import (
+    NAME_TO_COMPONENT,
+    RoboflowDetectionModel,
+    load_image_for_detection,
+    roboflow_detections_to_components,
+)
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 9876
+
+# Protocol revision reported by ping (2: subscribe, delta circuit_state;
+# 3: binary framing)
+PROTOCOL_VERSION = 3
+
+# Commands a client may have waiting before the server stops reading from it
+COMMAND_QUEUE_SIZE = 8
+
+# Longest accepted command line (bytes)
+MAX_LINE_BYTES = 1 << 20
+
+# Push mode: default and upper limit of a subscriber's pushes per second
+DEFAULT_MAX_RATE = 5.0
+MAX_PUSH_RATE = 30.0
+
+# Binary framing: frame header and frame types
+FRAME_HEADER = struct.Struct("<IB")
+FRAME_JSON = 0
+FRAME_CIRCUIT = 1
+
+# Circuit frame header: flags, seq, base, quality, confidence (x255),
+# component / moved / removed counts, capture / inference / mapping / total ms
+CIRCUIT_HEADER = struct.Struct("<BIIBBHHH4f")
+CIRCUIT_DELTA = 0x01
+
+# One component per record: id, type, leg1 row / col, leg2 row / col,
+# confidence (x255). Type, column and quality codes index the tables sent
+# in the ping reply; column 0 means no leg.
+WIRE_RECORD = struct.Struct("<HBBBBBB")
+WIRE_TYPES = ("unknown",) + tuple(sorted({name.lower() for name in NAME_TO_COMPONENT.values()}))
+WIRE_COLUMNS = tuple(name.lower() for name in COLUMN_NAMES)
+WIRE_QUALITIES = ("unknown", "good", "fair", "poor")
+_TYPE_CODES = {name: code for code, name in enumerate(WIRE_TYPES)}
+_COLUMN_CODES = {name: code for code, name in enumerate(WIRE_COLUMNS)}
+
+# compare: "series" circuits up to this many parts are matched against every
+# part order; longer ones only need to close a circuit between the rails
+MAX_SERIES_PARTS = 6
+
+
+class ClientSession:
+    """Per-connection state: the writer, filtering and the push subscription."""
+
+    def __init__(self, writer: asyncio.StreamWriter, min_confidence: float = 0.5):
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.min_confidence = min_confidence    # This client's component filter
+
+        # Push subscription
+        self.max_rate = 0.0                     # 0 = not subscribed
+        self.sent_signature = None              # Component set last pushed
+        self.pending = None                     # (data, signature) waiting to be pushed
+        self.wake = asyncio.Event()
+        self.pusher: Optional[asyncio.Task] = None
+
+        self.delta: Optional[CircuitDeltaEncoder] = None  # Set when delta mode is on
+
+        self.framing = "json"
+        self.next_framing: Optional[str] = None  # Takes effect after the ping reply
+
+    @property
+    def subscribed(self) -> bool:
+        return self.max_rate > 0
+
+    def encode(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Response data as this client receives it (circuit_state diffed in delta mode)."""
+        if self.delta is None or "circuit_state" not in data:
+            return data
+        data = dict(data)  # Detection results are shared between clients
+        data["circuit_state"] = self.delta.encode(data["circuit_state"])
+        return data
+
+    def frame(self, message: Dict[str, Any]) -> bytes:
+        """Message bytes in this connection's framing."""
+        if self.framing != "binary":
+            return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+        payload = encode_circuit_frame(message)
+        if payload is not None:
+            return FRAME_HEADER.pack(len(payload), FRAME_CIRCUIT) + payload
+        payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        return FRAME_HEADER.pack(len(payload), FRAME_JSON) + payload
+
+    def offer(self, data: Dict[str, Any], signature: tuple) -> None:
+        """New live result; replaces any result still waiting (coalescing)."""
+        if signature == self.sent_signature and self.pending is None:
+            return
+        self.pending = (data, signature)
+        self.wake.set()
+
+
+class DetectionServer:
+    """
+    Asyncio server for the DetectionClient.gd protocol.
+
+    Args:
+        model: Detection model shared by all clients (loaded on first start)
+        frame_source: Callable returning the current RGB frame (H, W, 3) uint8
+        host: Interface to listen on
+        port: TCP port
+        workers: Threads for capture / inference / mapping
+        min_confidence: Default component filter of new connections (each
+            client can change its own with configure)
+    """
+
+    def __init__(
+        self,
+        model: RoboflowDetectionModel,
+        frame_source: Optional[Callable[[], Any]] = None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        workers: int = 2,
+        min_confidence: float = 0.5,
+    ):
+        self.model = model
+        self.frame_source = frame_source
+        self.host = host
+        self.port = port
+        self.min_confidence = min_confidence
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detect-server")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._detection: Optional[asyncio.Task] = None  # Detection in flight, shared
+        self._clients = 0
+        self._subscribers: set = set()                 # ClientSessions in push mode
+        self._live_task: Optional[asyncio.Task] = None
+        self.stats = {"connections": 0, "commands": 0, "detections": 0,
+                      "shared_detections": 0, "pushes": 0}
+
+    # =========================================================================
+    # LIFECYCLE
+    # =========================================================================
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._load_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, limit=MAX_LINE_BYTES)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        print(f"[DetectionServer] Listening on {self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        """Start listening and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop listening and release the worker threads."""
+        if self._live_task is not None:
+            self._live_task.cancel()
+            self._live_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func: Callable, *args) -> Any:
+        """Run blocking work in the thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # =========================================================================
+    # CONNECTIONS
+    # =========================================================================
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client: read commands into its queue, answer them in order."""
+        peer = writer.get_extra_info("peername")
+        self._clients += 1
+        self.stats["connections"] += 1
+        print(f"[DetectionServer] Client connected: {peer} ({self._clients} active)")
+
+        session = ClientSession(writer, self.min_confidence)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=COMMAND_QUEUE_SIZE)
+        worker = asyncio.create_task(self._client_worker(queue, session))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(session, _error("Command too long"))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Blocks while the queue is full - backpressure for this client
+                # only - but gives up if the worker stops consuming
+                put = asyncio.ensure_future(queue.put(line))
+                await asyncio.wait({put, worker}, return_when=asyncio.FIRST_COMPLETED)
+                if not put.done():
+                    put.cancel()
+                if worker.done():
+                    break
+        finally:
+            if not worker.done():
+                # Nobody is left to answer: drop queued commands so the
+                # sentinel can't block on a full queue, and let the worker
+                # finish only the command it is running
+                while not queue.empty():
+                    queue.get_nowait()
+                await queue.put(None)
+                await worker
+            self._unsubscribe(session)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._clients -= 1
+            print(f"[DetectionServer] Client disconnected: {peer} ({self._clients} active)")
+
+    async def _client_worker(self, queue: asyncio.Queue, session: ClientSession) -> None:
+        """Answer one client's commands in arrival order."""
+        try:
+            await self._answer_commands(queue, session)
+        finally:
+            session.writer.close()  # Ends the reader too
+
+    async def _answer_commands(self, queue: asyncio.Queue, session: ClientSession) -> None:
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("command must be a JSON object")
+            except ValueError as e:
+                await self._send(session, _error(f"Invalid JSON: {e}"))
+                continue
+
+            command = str(request.get("command", ""))
+            self.stats["commands"] += 1
+            if command == "quit":
+                await self._send(session, _ok(command, "bye"))
+                return
+
+            handler = self._handlers().get(command)
+            if handler is None:
+                response = _error(f"Unknown command: {command}", command)
+            else:
+                try:
+                    response = await handler(session, request)
+                except Exception as e:
+                    print(f"[DetectionServer] {command} failed: {e}")
+                    response = _error(f"{command} failed: {e}", command)
+
+            if not await self._send(session, response):
+                return
+
+    async def _send(self, session: ClientSession, message: Dict[str, Any]) -> bool:
+        """Write one message; False if the client has gone away."""
+        try:
+            session.writer.write(session.frame(message))
+            if session.next_framing is not None and message.get("command") == "ping":
+                # Switch right behind the reply, before anything else is written
+                session.framing, session.next_framing = session.next_framing, None
+            await session.writer.drain()
+            return True
+        except ConnectionError:
+            return False
+
+    # =========================================================================
+    # COMMANDS
+    # =========================================================================
+
+    def _handlers(self) -> Dict[str, Callable]:
+        return {
+            "ping": self._cmd_ping,
+            "start": self._cmd_start,
+            "stop": self._cmd_stop,
+            "detect": self._cmd_detect,
+            "compare": self._cmd_compare,
+            "status": self._cmd_status,
+            "configure": self._cmd_configure,
+            "subscribe": self._cmd_subscribe,
+            "unsubscribe": self._cmd_unsubscribe,
+            "resync": self._cmd_resync,
+        }
+
+    async def _cmd_ping(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        framing = request.get("framing")
+        if framing is None:
+            return _ok("ping", "pong", {"protocol": PROTOCOL_VERSION, "framing": session.framing})
+        if framing not in ("json", "binary"):
+            return _error(f"Unknown framing: {framing}", "ping")
+
+        session.next_framing = framing
+        data = {"protocol": PROTOCOL_VERSION, "framing": framing}
+        if framing == "binary":
+            data.update(types=list(WIRE_TYPES), columns=list(WIRE_COLUMNS),
+                        qualities=list(WIRE_QUALITIES))
+        return _ok("ping", "pong", data)
+
+    async def _cmd_start(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        if not await self._ensure_loaded():
+            return _error("Model failed to load", "start")
+        return _ok("start", "Pipeline running", {"model": self.model.model_id})
+
+    async def _cmd_stop(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        # The model is shared - it stays loaded for the other clients
+        return _ok("stop", "Pipeline stopped")
+
+    async def _cmd_detect(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._result(session, await self._shared_detection())
+        return _ok("detect", "Detection complete", session.encode(data))
+
+    async def _cmd_compare(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._result(session, await self._shared_detection())
+        data.update(compare_circuit(data["circuit_state"]["components"], request.get("expected", {})))
+        return _ok("compare", "Comparison complete", session.encode(data))
+
+    async def _cmd_status(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        return _ok("status", "ok", {
+            "model": self.model.model_id,
+            "loaded": self.model.is_loaded,
+            "has_camera": self.frame_source is not None,
+            "clients": self._clients,
+            "subscribers": len(self._subscribers),
+            "stats": dict(self.stats),
+        })
+
+    async def _cmd_configure(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        if request.get("use_mock"):
+            return _error("Mock mode is not available on this server", "configure")
+        if request.get("model_path"):
+            return _error("The model is configured on the server (model_config.json)", "configure")
+        if "min_confidence" in request:
+            session.min_confidence = float(request["min_confidence"])
+        if "delta" in request:
+            # Per connection; a fresh encoder starts with a full snapshot
+            session.delta = CircuitDeltaEncoder() if request["delta"] else None
+        return _ok("configure", "Configured", {
+            "min_confidence": session.min_confidence,
+            "delta": session.delta is not None,
+        })
+
+    async def _cmd_resync(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        if session.delta is None:
+            return _error("Delta mode is not enabled", "resync")
+        return _ok("resync", "Full state", {"circuit_state": session.delta.snapshot()})
+
+    async def _cmd_subscribe(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        if self.frame_source is None:
+            return _error("No camera / frame source configured", "subscribe")
+        try:
+            max_rate = float(request.get("max_rate", DEFAULT_MAX_RATE))
+        except (TypeError, ValueError):
+            return _error("max_rate must be a number", "subscribe")
+        if max_rate <= 0:
+            return _error("max_rate must be positive", "subscribe")
+
+        session.max_rate = min(max_rate, MAX_PUSH_RATE)
+        session.sent_signature = None  # First live result is always pushed
+        if session.pusher is None or session.pusher.done():
+            session.pusher = asyncio.create_task(self._push_loop(session))
+        self._subscribers.add(session)
+        if self._live_task is None or self._live_task.done():
+            self._live_task = asyncio.create_task(self._live_loop())
+        return _ok("subscribe", "Subscribed", {"max_rate": session.max_rate})
+
+    async def _cmd_unsubscribe(self, session: ClientSession, request: Dict[str, Any]) -> Dict[str, Any]:
+        self._unsubscribe(session)
+        return _ok("unsubscribe", "Unsubscribed")
+
+    def _unsubscribe(self, session: ClientSession) -> None:
+        """End a session's push mode (the live loop stops with the last subscriber)."""
+        session.max_rate = 0.0
+        session.pending = None
+        self._subscribers.discard(session)
+        if session.pusher is not None:
+            session.pusher.cancel()
+            session.pusher = None
+
+    # =========================================================================
+    # PUSH MODE
+    # =========================================================================
+
+    async def _live_loop(self) -> None:
+        """Detect continuously while anyone is subscribed, offering results to each."""
+        print("[DetectionServer] Live loop started")
+        loop = asyncio.get_running_loop()
+        while self._subscribers:
+            started = loop.time()
+            try:
+                detection = await self._shared_detection()
+            except Exception as e:
+                print(f"[DetectionServer] Live detection failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+
+            for session in list(self._subscribers):
+                data = self._result(session, detection)
+                session.offer(data, component_signature(data["circuit_state"]["components"]))
+
+            # No point detecting faster than the fastest subscriber can be pushed to
+            rates = [session.max_rate for session in self._subscribers]
+            interval = 1.0 / max(rates) if rates else 0.0
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        print("[DetectionServer] Live loop stopped")
+
+    async def _push_loop(self, session: ClientSession) -> None:
+        """Send a subscriber its latest changed state, at most max_rate per second."""
+        while session.subscribed:
+            await session.wake.wait()
+            session.wake.clear()
+            if session.pending is None:
+                continue
+
+            data, signature = session.pending
+            session.pending = None
+            if signature == session.sent_signature:
+                continue  # Changed and changed back since the last push
+
+            message = _ok("subscribe", "Detection complete", session.encode(data))
+            message["event"] = "detection"
+            if not await self._send(session, message):
+                return
+            session.sent_signature = signature
+            self.stats["pushes"] += 1
+            await asyncio.sleep(1.0 / session.max_rate)
+
+    # =========================================================================
+    # DETECTION
+    # =========================================================================
+
+    async def _ensure_loaded(self) -> bool:
+        """Load the shared model once, whichever client asks first."""
+        async with self._load_lock:
+            if not self.model.is_loaded:
+                await self._run(self.model.load)
+            return self.model.is_loaded
+
+    def _result(self, session: ClientSession, detection: Dict[str, Any]) -> Dict[str, Any]:
+        """detection_complete-shaped data of a shared detection, filtered for one client."""
+        components = [c for c in detection["components"] if c.confidence >= session.min_confidence]
+        return {
+            "circuit_state": circuit_state(components),
+            "timing": detection["timing"],
+            "quality": detection_quality(components),
+        }
+
+    async def _shared_detection(self) -> Dict[str, Any]:
+        """Result of the detection in flight, or of a new one."""
+        if self._detection is not None and not self._detection.done():
+            self.stats["shared_detections"] += 1
+            return await asyncio.shield(self._detection)
+        self._detection = asyncio.ensure_future(self._detect())
+        return await asyncio.shield(self._detection)
+
+    async def _detect(self) -> Dict[str, Any]:
+        """
+        Capture, detect and map one frame.
+
+        Components are kept down to zero confidence; each client's own
+        min_confidence is applied by _result.
+        """
+        if self.frame_source is None:
+            raise RuntimeError("No camera / frame source configured")
+        if not await self._ensure_loaded():
+            raise RuntimeError("Model failed to load")
+
+        start = time.time()
+        frame = await self._run(self.frame_source)
+        captured = time.time()
+        output = await self._run(self.model.detect, frame)
+        detected = time.time()
+        components = await self._run(roboflow_detections_to_components, output, 0.0)
+        mapped = time.time()
+        self.stats["detections"] += 1
+
+        return {
+            "components": components,
+            "timing": {
+                "capture_ms": round((captured - start) * 1000, 1),
+                "inference_ms": round((detected - captured) * 1000, 1),
+                "mapping_ms": round((mapped - detected) * 1000, 1),
+                "total_ms": round((mapped - start) * 1000, 1),
+            },
+        }
+
+
+# =============================================================================
+# MESSAGE BUILDING
+# =============================================================================
+
+def _ok(command: str, message: str = "", data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {"status": "ok", "command": command, "message": message, "data": data or {}}
+
+
+def _error(message: str, command: str = "") -> Dict[str, Any]:
+    return {"status": "error", "command": command, "message": message, "data": {}}
+
+
+def component_to_dict(comp) -> Dict[str, Any]:
+    """DetectedComponent as a DetectionClient.gd component dict."""
+    legs = []
+    for pos in (comp.position_leg1, comp.position_leg2):
+        legs.append(None if pos is None else {"row": pos.row, "col": str(pos.column).lower()})
+    return {
+        "type": component_type_name(comp).lower(),
+        "leg1": legs[0] or {},
+        "leg2": legs[1],
+        "confidence": round(float(comp.confidence), 3),
+        "value": getattr(comp, "value", "") or "",
+        "color": getattr(comp, "color", "") or "",
+    }
+
+
+def circuit_state(components: List[Any]) -> Dict[str, Any]:
+    """circuit_state block: component dicts and mean confidence."""
+    confidence = sum(c.confidence for c in components) / len(components) if components else 0.0
+    return {
+        "components": [component_to_dict(c) for c in components],
+        "confidence": round(float(confidence), 3),
+    }
+
+
+def component_signature(components: List[Dict[str, Any]]) -> tuple:
+    """Order-independent identity of a component set (type and legs only)."""
+    return tuple(sorted((_component_key(c) for c in components), key=repr))
+
+
+def _component_key(comp: Dict[str, Any]) -> tuple:
+    return (comp["type"], _leg_key(comp.get("leg1")), _leg_key(comp.get("leg2")))
+
+
+def _leg_key(leg: Optional[Dict[str, Any]]) -> Optional[tuple]:
+    return (leg.get("row"), leg.get("col")) if leg else None
+
+
+class CircuitDeltaEncoder:
+    """
+    Turns one connection's successive circuit_state blocks into diffs.
+
+    Components keep a stable id while they stay on the board: an unchanged
+    component (same type and holes) keeps its id, and a component of the
+    same type that kept one of its holes is reported as moved. Anything
+    else is added or removed.
+
+    The base of each diff is the state sent just before it. The connection
+    is TCP, so everything written arrives, in order, unless the connection
+    itself drops. The client checks "base" against the seq it holds and asks
+    for a resync when they differ.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self._components: Dict[int, Dict[str, Any]] = {}  # id -> component as last sent
+        self._confidence = 0.0
+        self._next_id = 1
+        self._full = True  # Next state goes out as a snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full circuit_state of the current components; diffs continue from it."""
+        self.seq += 1
+        self._full = False
+        return {
+            "seq": self.seq,
+            "components": list(self._components.values()),
+            "confidence": self._confidence,
+        }
+
+    def encode(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Encode the next circuit_state.
+
+        Args:
+            state: Full circuit_state block (see circuit_state())
+
+        Returns:
+            Full snapshot for the first state, otherwise a diff
+        """
+        previous = dict(self._components)
+        components = state["components"]
+        ids: List[Optional[int]] = [None] * len(components)
+
+        # Unchanged: same type on the same holes
+        unchanged = defaultdict(list)
+        for comp_id, comp in previous.items():
+            unchanged[_component_key(comp)].append(comp_id)
+        for i, comp in enumerate(components):
+            candidates = unchanged.get(_component_key(comp))
+            if candidates:
+                ids[i] = candidates.pop(0)
+                del previous[ids[i]]
+
+        # Moved: same type, still sharing a hole
+        moved = []
+        for i, comp in enumerate(components):
+            if ids[i] is not None:
+                continue
+            holes = {_leg_key(comp.get("leg1")), _leg_key(comp.get("leg2"))} - {None}
+            for comp_id, old in previous.items():
+                old_holes = {_leg_key(old.get("leg1")), _leg_key(old.get("leg2"))}
+                if old["type"] == comp["type"] and holes & old_holes:
+                    ids[i] = comp_id
+                    del previous[comp_id]
+                    moved.append(i)
+                    break
+
+        added = []
+        for i in range(len(components)):
+            if ids[i] is None:
+                ids[i] = self._next_id
+                self._next_id += 1
+                added.append(i)
+
+        self._components = {
+            comp_id: dict(comp, id=comp_id) for comp_id, comp in zip(ids, components)
+        }
+        self._confidence = state.get("confidence", 0.0)
+
+        if self._full:
+            return self.snapshot()
+
+        self.seq += 1
+        return {
+            "seq": self.seq,
+            "base": self.seq - 1,
+            "delta": True,
+            "added": [self._components[ids[i]] for i in added],
+            "moved": [
+                {
+                    "id": ids[i],
+                    "leg1": components[i].get("leg1"),
+                    "leg2": components[i].get("leg2"),
+                    "confidence": components[i].get("confidence"),
+                }
+                for i in moved
+            ],
+            "removed": list(previous),
+            "confidence": self._confidence,
+        }
+
+
+def encode_circuit_frame(message: Dict[str, Any]) -> Optional[bytes]:
+    """
+    FRAME_CIRCUIT payload of a detection result message.
+
+    Args:
+        message: Response message; encodable if it is a successful result
+            carrying circuit_state (full, delta snapshot or diff) and no
+            comparison
+
+    Returns:
+        Payload bytes, or None if the message has to go as JSON (errors,
+        comparisons, values outside the wire tables)
+    """
+    data = message.get("data") or {}
+    state = data.get("circuit_state")
+    if message.get("status") != "ok" or state is None or "comparison" in data:
+        return None
+
+    if state.get("delta"):
+        flags = CIRCUIT_DELTA
+        components = state.get("added", [])
+        moved = state.get("moved", [])
+        removed = state.get("removed", [])
+    else:
+        flags = 0
+        components = state.get("components", [])
+        moved, removed = [], []
+
+    try:
+        values = []
+        for i, comp in enumerate(components + moved):
+            leg1 = comp.get("leg1") or _NO_LEG
+            leg2 = comp.get("leg2") or _NO_LEG
+            values += (
+                comp.get("id", i), _TYPE_CODES.get(comp.get("type"), 0),
+                leg1["row"], _COLUMN_CODES[leg1["col"]],
+                leg2["row"], _COLUMN_CODES[leg2["col"]],
+                round((comp.get("confidence") or 0.0) * 255),
+            )
+        # One pack for all records; raises struct.error if a value does not fit
+        records = struct.pack("<" + WIRE_RECORD.format[1:] * len(components + moved), *values)
+        timing = data.get("timing", {})
+        header = CIRCUIT_HEADER.pack(
+            flags, state.get("seq", 0), state.get("base", 0),
+            WIRE_QUALITIES.index(data.get("quality", "unknown")),
+            round(float(state.get("confidence", 0.0)) * 255),
+            len(components), len(moved), len(removed),
+            timing.get("capture_ms", 0.0), timing.get("inference_ms", 0.0),
+            timing.get("mapping_ms", 0.0), timing.get("total_ms", 0.0),
+        )
+        return header + records + struct.pack(f"<{len(removed)}H", *removed)
+    except (KeyError, ValueError, TypeError, struct.error):
+        return None
+
+
+_NO_LEG = {"row": 0, "col": ""}
+
+
+def benchmark_framing(counts=(5, 10, 20), repeat: int = 2000) -> List[Dict[str, Any]]:
+    """
+    Compare JSON and binary size / encode time for typical board results.
+
+    Args:
+        counts: Component counts to test
+        repeat: Encodes per measurement
+
+    Returns:
+        One row per count with sizes (bytes) and encode times (us)
+    """
+    json_session = ClientSession.__new__(ClientSession)
+    json_session.framing = "json"
+    binary_session = ClientSession.__new__(ClientSession)
+    binary_session.framing = "binary"
+
+    rng = random.Random(0)
+    results = []
+    for count in counts:
+        components = [{
+            "type": WIRE_TYPES[1 + i % (len(WIRE_TYPES) - 1)],
+            "leg1": {"row": rng.randint(1, 30), "col": WIRE_COLUMNS[1 + i % 10]},
+            "leg2": {"row": rng.randint(1, 30), "col": WIRE_COLUMNS[1 + (i + 3) % 10]},
+            "confidence": round(rng.uniform(0.5, 1.0), 3),
+            "value": "",
+            "color": "",
+        } for i in range(count)]
+        message = _ok("detect", "Detection complete", {
+            "circuit_state": {"components": components, "confidence": 0.8},
+            "timing": {"capture_ms": 4.2, "inference_ms": 180.5, "mapping_ms": 1.3, "total_ms": 186.0},
+            "quality": "good",
+        })
+
+        row = {"components": count}
+        for name, session in (("json", json_session), ("binary", binary_session)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encoded = session.frame(message)
+            row[f"{name}_bytes"] = len(encoded)
+            row[f"{name}_us"] = round((time.perf_counter() - start) / repeat * 1e6, 1)
+        results.append(row)
+        print(f"  {count:3d} components: JSON {row['json_bytes']:5d} B {row['json_us']:6.1f} us | "
+              f"binary {row['binary_bytes']:4d} B {row['binary_us']:6.1f} us")
+    return results
+
+
+def detection_quality(components: List[Any]) -> str:
+    """Rough detection quality from mean confidence."""
+    if not components:
+        return "unknown"
+    confidence = sum(c.confidence for c in components) / len(components)
+    if confidence >= 0.75:
+        return "good"
+    if confidence >= 0.5:
+        return "fair"
+    return "poor"
+
+
+def compare_circuit(detected: List[Dict[str, Any]], expected: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare detected component dicts with an expected circuit, net by net.
+
+    The detected parts are grouped into nets (netlist.build_netlist). A
+    "series" circuit must have the same net graph as the expected parts
+    chained from a + rail to a - rail, in some order; other topologies must
+    at least close one circuit between the rails with no dangling legs.
+    Type counts only feed the diagnostics (wires are not counted unless
+    the expected circuit lists them).
+
+    Args:
+        detected: circuit_state component dicts
+        expected: {"name": ..., "components": [{"type": "led", ...}, ...],
+            "topology": "series"}
+
+    Returns:
+        comparison, is_correct, score and hint fields of a compare response
+    """
+    want = Counter(str(c.get("type", "")).lower() for c in expected.get("components", []))
+    counted = [c for c in detected
+               if c["type"].upper() not in CONDUCTOR_TYPES or c["type"] in want]
+    have = Counter(c["type"] for c in counted)
+
+    matched = sum((want & have).values())
+    missing = want - have
+    extra = have - want
+
+    netlist = build_netlist([_netlist_part(c) for c in detected])
+    parts = sorted(t for t in want.elements() if t.upper() not in CONDUCTOR_TYPES)
+    topology = str(expected.get("topology", "")).lower()
+    if not parts:
+        connected = not netlist.components
+    elif topology == "series" and len(parts) <= MAX_SERIES_PARTS:
+        connected = any(netlist.same_circuit(reference) for reference in _series_references(parts))
+    else:
+        connected = _closed_circuit(netlist)
+
+    errors = []
+    for comp_type, count in sorted(missing.items()):
+        errors.append({
+            "code": "MISSING_COMPONENT",
+            "severity": "critical",
+            "message": f"Missing {count} {comp_type}" + ("s" if count > 1 else ""),
+            "component_type": comp_type,
+        })
+    for comp_type, count in sorted(extra.items()):
+        errors.append({
+            "code": "EXTRA_COMPONENT",
+            "severity": "warning",
+            "message": f"Unexpected {comp_type}" + (f" (x{count})" if count > 1 else ""),
+            "component_type": comp_type,
+        })
+    if not connected and not missing:
+        errors.append({
+            "code": "WRONG_CONNECTION",
+            "severity": "critical",
+            "message": (f"Parts are not wired in {topology} between + and -" if topology
+                        else "Parts don't close a circuit between + and -"),
+            "component_type": "",
+        })
+
+    total = sum(want.values())
+    score = matched / (total + sum(extra.values())) if total else (0.0 if extra else 1.0)
+    if not connected:
+        score /= 2
+    if missing:
+        hint = f"Check your {errors[0]['component_type']} - it isn't on the board yet."
+    elif extra:
+        hint = f"There's an extra {next(iter(sorted(extra)))} on the board."
+    elif not connected:
+        hint = "All the parts are there - check the wiring from + to -."
+    else:
+        hint = ""
+
+    return {
+        "comparison": {
+            "matched_count": matched,
+            "missing_count": sum(missing.values()),
+            "extra_count": sum(extra.values()),
+            "connected": connected,
+            "errors": errors,
+        },
+        "is_correct": connected and not missing and not extra,
+        "score": round(score, 3),
+        "hint": hint,
+    }
+
+
+def _netlist_part(comp: Dict[str, Any]) -> SimpleNamespace:
+    """A circuit_state component dict in the shape build_netlist reads."""
+    legs = []
+    for leg in (comp.get("leg1"), comp.get("leg2")):
+        col = (leg or {}).get("col")
+        if not col:
+            legs.append(None)
+            continue
+        # Rails are lower-case on the wire ('+l'), upper-case in the netlist
+        legs.append({"row": leg.get("row"), "col": col.upper() if col.upper() in RAILS else col})
+    return SimpleNamespace(component_type=comp["type"], position_leg1=legs[0], position_leg2=legs[1])
+
+
+def _series_references(parts: List[str]):
+    """Netlists of the parts chained from +L to -L, one per distinct order."""
+    for order in sorted(set(permutations(parts))):
+        holes = [{"col": "+L"}] + [{"row": row, "col": "a"} for row in range(1, len(order))] + [{"col": "-L"}]
+        yield build_netlist([
+            SimpleNamespace(component_type=type_name, position_leg1=holes[i], position_leg2=holes[i + 1])
+            for i, type_name in enumerate(order)
+        ])
+
+
+def _closed_circuit(netlist) -> bool:
+    """True if the parts form one connected circuit between a + and a - rail."""
+    rails = defaultdict(set)
+    for rail in RAILS:
+        rails[netlist.net_of(None, rail)].add(rail[0])
+
+    legs = Counter()
+    links = defaultdict(set)
+    for _, net1, net2, _ in netlist.components:
+        if net1 is None or net2 is None:
+            return False  # Leg off the board
+        legs.update((net1, net2))
+        links[net1].add(net2)
+        links[net2].add(net1)
+    if not legs:
+        return False
+
+    # Off the rails, every junction needs at least two legs
+    if any(count < 2 for net, count in legs.items() if net not in rails):
+        return False
+
+    start = next(iter(legs))
+    reached = {start}
+    stack = [start]
+    while stack:
+        for net in links[stack.pop()]:
+            if net not in reached:
+                reached.add(net)
+                stack.append(net)
+    polarities = set().union(*(rails.get(net, set()) for net in reached))
+    return reached == set(legs) and {"+", "-"} <= polarities
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    """Run the server with a static test image as the camera."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="KaidoTrainer detection server")
+    parser.add_argument("--config", help="Path to model config JSON")
+    parser.add_argument("--api-key", help="Roboflow API key")
+    parser.add_argument("--image", help="Serve detections of this image (no camera)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--benchmark", action="store_true", help="Compare JSON and binary framing")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print("[DetectionServer] Framing benchmark")
+        benchmark_framing()
+        return
+
+    if args.config:
+        model = RoboflowDetectionModel.from_config(Path(args.config))
+    else:
+        model = RoboflowDetectionModel(api_key=args.api_key)
+
+    frame_source = None
+    if args.image:
+        frame = load_image_for_detection(Path(args.image))
+        frame_source = lambda: frame
+
+    server = DetectionServer(model, frame_source, args.host, args.port, args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("[DetectionServer] Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Breadboard Grid Detector
+Finds the hole lattice and power rails in a single camera frame and calibrates
+the GridMapper - no hand-edited constants or clicked corners needed.
+
+Works on the RGB NumPy frames returned by load_image_for_detection() or the
+camera. Uses only NumPy (row/column projections of a hole mask), so it runs
+in a few tens of milliseconds on the Pi and can run at every session start.
+
+Assumptions:
+    - Board roughly axis-aligned: rows run down the image, columns a-j across
+    - Board mostly empty (components hide holes and weaken the lattice)
+    For a tilted camera, follow up with GridMapper.recalibrate_homography().
+"""
+
+import time
+
+import numpy as np
+
+# Detection works on a downsampled copy no wider than this
+WORK_WIDTH = 640
+
+# Holes are darker than this fraction of the board brightness
+HOLE_DARKNESS = 0.6
+
+# Pixels with a channel spread above this are colored (stripes, parts), not holes
+MAX_HOLE_SATURATION = 60
+
+# Spacing between neighbouring columns/rows may vary this much within a group
+SPACING_TOLERANCE = 0.15
+
+
+def detect_grid(frame, num_rows=30, num_cols_per_side=5):
+    """
+    Find the breadboard hole lattice and power rails in a frame.
+
+    Args:
+        frame: RGB numpy array (H, W, 3), uint8
+        num_rows: Number of rows on the breadboard
+        num_cols_per_side: Columns per grid section (a-e / f-j)
+
+    Returns:
+        Dict with:
+            - 'corners': Hole positions for GridMapper.recalibrate()
+              ('a1', 'e1', 'a30', 'f1', 'j1', plus '+L1', '-L1', '+R1', '-R1'
+              for each rail whose polarity was found), in full-frame pixels
+            - 'rails': Per side ('L', 'R'): row 1 'outer' and 'inner' rail
+              hole positions and 'positive' ('outer', 'inner', or None
+              when the stripe colors were not conclusive)
+            - 'row_spacing': Pixel spacing between rows
+            - 'col_spacing': Pixel spacing between columns
+            - 'time_ms': Detection time
+        or None if no breadboard lattice was found.
+    """
+    start_time = time.perf_counter()
+
+    # Strided downsample - cheap and good enough to locate holes
+    step = max(1, int(np.ceil(frame.shape[1] / WORK_WIDTH)))
+    small = frame[::step, ::step, :3].astype(np.int32)
+
+    gray = (small[..., 0] * 299 + small[..., 1] * 587 + small[..., 2] * 114) // 1000
+    spread = small.max(axis=2) - small.min(axis=2)
+
+    board = _board_bounds(gray)
+    if board is None:
+        print("[GridDetector] No breadboard found (no bright board region)")
+        return None
+    top, bottom, left, right = board
+
+    gray = gray[top:bottom, left:right]
+    spread = spread[top:bottom, left:right]
+    colors = small[top:bottom, left:right]
+
+    board_level = np.median(gray)
+    holes = (gray < board_level * HOLE_DARKNESS) & (spread < MAX_HOLE_SATURATION)
+
+    # Columns: hole density per X across the board height
+    col_peaks, col_strength = _find_peaks(holes.mean(axis=0))
+    groups = _find_grid_groups(col_peaks, col_strength, num_cols_per_side)
+    if groups is None:
+        print(f"[GridDetector] No grid columns found ({len(col_peaks)} candidate columns)")
+        return None
+    left_cols, right_cols = groups
+    col_spacing = (np.diff(left_cols).mean() + np.diff(right_cols).mean()) / 2
+
+    # Rows: hole density per Y across the main grid only (rails have gaps)
+    x0 = max(0, int(left_cols[0] - col_spacing / 2))
+    x1 = int(right_cols[-1] + col_spacing / 2) + 1
+    row_peaks, _ = _find_peaks(holes[:, x0:x1].mean(axis=1))
+    rows = _fit_rows(row_peaks, num_rows)
+    if rows is None:
+        print(f"[GridDetector] Could not fit {num_rows} rows ({len(row_peaks)} candidate rows)")
+        return None
+    row_1, row_last = rows
+    row_spacing = (row_last - row_1) / (num_rows - 1)
+
+    # Power rails: the two hole columns outside each grid section
+    rails = _find_rails(col_peaks, left_cols, right_cols, col_spacing, colors)
+
+    def to_frame(x, y):
+        return (float((x + left) * step), float((y + top) * step))
+
+    corners = {
+        'a1': to_frame(left_cols[0], row_1),
+        'e1': to_frame(left_cols[-1], row_1),
+        'a30': to_frame(left_cols[0], row_last),
+        'f1': to_frame(right_cols[0], row_1),
+        'j1': to_frame(right_cols[-1], row_1),
+    }
+    rail_holes = {}
+    for side, (outer, inner, positive) in rails.items():
+        rail_holes[side] = {
+            'outer': to_frame(outer, row_1),
+            'inner': to_frame(inner, row_1),
+            'positive': positive,
+        }
+        if positive is not None:
+            negative = 'inner' if positive == 'outer' else 'outer'
+            corners[f'+{side}1'] = rail_holes[side][positive]
+            corners[f'-{side}1'] = rail_holes[side][negative]
+
+    elapsed = (time.perf_counter() - start_time) * 1000
+    print(f"[GridDetector] Found grid in {elapsed:.0f}ms: {2 * len(rails)} rail columns, "
+          f"row_spacing={row_spacing * step:.1f}px, col_spacing={col_spacing * step:.1f}px")
+
+    return {
+        'corners': corners,
+        'rails': rail_holes,
+        'row_spacing': row_spacing * step,
+        'col_spacing': col_spacing * step,
+        'time_ms': elapsed,
+    }
+
+
+def auto_calibrate(mapper, frame):
+    """
+    Detect the grid in a frame and recalibrate a GridMapper with it.
+
+    Args:
+        mapper: GridMapper to recalibrate
+        frame: RGB numpy array (H, W, 3), uint8
+
+    Returns:
+        True if the grid was found and the mapper recalibrated
+    """
+    found = detect_grid(frame, mapper.num_rows, mapper.num_cols_per_side)
+    if found is None:
+        return False
+
+    corners = found['corners']
+    # Keep the mapper's rail polarity where stripe colors were not conclusive
+    for side, rail in (('L', mapper.left_power), ('R', mapper.right_power)):
+        holes = found['rails'].get(side)
+        if holes is None or holes['positive'] is not None:
+            continue
+        positive_outer = (rail['positive_x'] < rail['negative_x']) == (side == 'L')
+        corners[f'+{side}1'] = holes['outer'] if positive_outer else holes['inner']
+        corners[f'-{side}1'] = holes['inner'] if positive_outer else holes['outer']
+
+    # Detection coordinates are in frame pixels
+    mapper.image_height, mapper.image_width = frame.shape[:2]
+    mapper.recalibrate(corners)
+    return True
+
+
+def _board_bounds(gray):
+    """Bounding box (top, bottom, left, right) of the bright board region."""
+    threshold = _otsu_threshold(gray)
+    bright = gray > threshold
+
+    # Rows/columns that cross the board are mostly bright (relative to the
+    # widest crossing, since the board need not fill the frame)
+    row_fill = bright.mean(axis=1)
+    col_fill = bright.mean(axis=0)
+    rows = np.flatnonzero(row_fill > 0.5 * row_fill.max())
+    cols = np.flatnonzero(col_fill > 0.5 * col_fill.max())
+    if len(rows) < 10 or len(cols) < 10:
+        return None
+
+    # Bridge thin dark lines across the board (printed rail stripes)
+    top, bottom = _longest_run(rows, max_gap=len(row_fill) // 50)
+    left, right = _longest_run(cols, max_gap=len(col_fill) // 50)
+    return top, bottom + 1, left, right + 1
+
+
+def _otsu_threshold(gray):
+    """Threshold separating the two brightness classes of an image."""
+    hist = np.bincount(gray.ravel().clip(0, 255), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    mean = np.cumsum(hist * levels)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (mean[-1] * weight - mean * total) ** 2 / (weight * (total - weight))
+    if np.all(np.isnan(between)):
+        return int(levels[gray.ravel()[0]])  # Flat image - nothing to separate
+    return int(np.nanargmax(between))
+
+
+def _longest_run(indices, max_gap=0):
+    """First and last value of the longest run of integers with small gaps."""
+    breaks = np.flatnonzero(np.diff(indices) > max_gap + 1)
+    starts = np.concatenate([[0], breaks + 1])
+    ends = np.concatenate([breaks, [len(indices) - 1]])
+    longest = np.argmax(ends - starts)
+    return indices[starts[longest]], indices[ends[longest]]
+
+
+def _find_peaks(profile, min_fraction=0.3):
+    """
+    Sub-pixel positions and heights of the local maxima of a profile.
+
+    Only peaks above min_fraction of the strongest peak are kept.
+    """
+    # Light smoothing so a hole a few pixels wide gives a single maximum
+    smooth = np.convolve(profile, [0.25, 0.5, 0.25], mode='same')
+
+    center = smooth[1:-1]
+    is_peak = (center > smooth[:-2]) & (center >= smooth[2:])
+    is_peak &= center > min_fraction * smooth.max()
+    idx = np.flatnonzero(is_peak) + 1
+
+    # Parabolic interpolation around each maximum
+    below, above = smooth[idx - 1], smooth[idx + 1]
+    curvature = below - 2 * smooth[idx] + above
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(curvature != 0, 0.5 * (below - above) / curvature, 0.0)
+
+    return idx + offset, smooth[idx]
+
+
+def _is_uniform(positions):
+    """True if neighbouring positions are evenly spaced."""
+    gaps = np.diff(positions)
+    return np.all(np.abs(gaps - gaps.mean()) <= SPACING_TOLERANCE * gaps.mean())
+
+
+def _find_grid_groups(peaks, strength, per_side):
+    """
+    Find the two adjacent groups of evenly spaced columns (a-e and f-j).
+
+    Returns (left_columns, right_columns) fitted to exact even spacing,
+    or None if no such pair exists.
+    """
+    best = None
+    for i in range(len(peaks) - 2 * per_side + 1):
+        left = peaks[i:i + per_side]
+        right = peaks[i + per_side:i + 2 * per_side]
+        if not (_is_uniform(left) and _is_uniform(right)):
+            continue
+
+        left_pitch = np.diff(left).mean()
+        right_pitch = np.diff(right).mean()
+        if abs(left_pitch - right_pitch) > SPACING_TOLERANCE * left_pitch:
+            continue
+        # The center gap is at least one hole pitch wide
+        if right[0] - left[-1] < 0.9 * left_pitch:
+            continue
+
+        score = strength[i:i + 2 * per_side].sum()
+        if best is None or score > best[0]:
+            best = (score, _fit_line(left), _fit_line(right))
+
+    return None if best is None else best[1:]
+
+
+def _fit_line(positions):
+    """Least-squares evenly spaced positions through noisy peaks."""
+    idx = np.arange(len(positions))
+    slope, intercept = np.polyfit(idx, positions, 1)
+    return intercept + slope * idx
+
+
+def _fit_rows(peaks, num_rows):
+    """
+    Fit evenly spaced rows to row peaks.
+
+    Returns (first_row_y, last_row_y) or None unless exactly num_rows rows
+    are spanned. Missing rows (e.g. hidden by a part) are tolerated.
+    """
+    if len(peaks) < 2:
+        return None
+
+    # Peaks sit on whole pixels, so gaps alternate around a fractional pitch
+    # and the median gap is off by up to a pixel. Count rows per gap (local
+    # rounding does not drift) and refine the pitch by least squares.
+    gaps = np.diff(peaks)
+    pitch = np.median(gaps)
+    for _ in range(3):
+        index = np.concatenate([[0], np.cumsum(np.maximum(1, np.round(gaps / pitch)))])
+        slope, intercept = np.polyfit(index, peaks, 1)
+        if np.isclose(slope, pitch):
+            break
+        pitch = slope
+
+    if index[-1] + 1 != num_rows:
+        return None
+    return intercept, intercept + slope * (num_rows - 1)
+
+
+def _find_rails(peaks, left_cols, right_cols, pitch, colors):
+    """
+    Locate the power rail hole columns outside each grid section.
+
+    Polarity comes from the printed stripes: the rail column nearer the red
+    stripe is positive. Returns side ('L'/'R') -> (outer_x, inner_x, positive)
+    where positive is 'outer', 'inner' or None if the stripes were not found.
+    """
+    rails = {}
+    sides = [
+        ('L', peaks[peaks < left_cols[0] - 0.5 * pitch][::-1]),
+        ('R', peaks[peaks > right_cols[-1] + 0.5 * pitch]),
+    ]
+    red, blue = _stripe_profiles(colors)
+
+    for side, candidates in sides:
+        # Nearest two columns to the grid, ordered inner then outer
+        if len(candidates) < 2:
+            continue
+        inner, outer = candidates[0], candidates[1]
+
+        lo = int(max(0, min(inner, outer) - pitch))
+        hi = int(min(len(red), max(inner, outer) + pitch)) + 1
+        red_x = _stripe_center(red, lo, hi)
+        blue_x = _stripe_center(blue, lo, hi)
+        positive = None
+        if red_x is not None and blue_x is not None:
+            positive = 'outer' if abs(red_x - outer) < abs(red_x - inner) else 'inner'
+        rails[side] = (outer, inner, positive)
+
+    return rails
+
+
+def _stripe_profiles(colors):
+    """Fraction of red / blue stripe pixels per X column."""
+    r, g, b = colors[..., 0], colors[..., 1], colors[..., 2]
+    red = (r > 80) & (r > 1.4 * g) & (r > 1.4 * b)
+    blue = (b > 80) & (b > 1.3 * r) & (b > 1.1 * g)
+    return red.mean(axis=0), blue.mean(axis=0)
+
+
+def _stripe_center(profile, lo, hi, min_fraction=0.2):
+    """X of the strongest stripe column in [lo, hi), or None if too faint."""
+    window = profile[lo:hi]
+    if len(window) == 0 or window.max() < min_fraction:
+        return None
+    return lo + int(np.argmax(window))
+
+
+def _synthetic_board(width, height, pitch, hidden_rows=()):
+    """
+    Render a clean breadboard: dark square holes on a light board with a
+    power rail pair and red/blue stripes on each side (red nearest the outer
+    rail column). hidden_rows (1-based) are painted over, as a part would.
+
+    Returns (frame, (a1_x, a1_y)).
+    """
+    frame = np.full((height, width, 3), 60, np.uint8)
+    ax, ay = width * 0.3, height * 0.08
+    grid = [ax + i * pitch for i in range(5)] + [ax + (i + 7) * pitch for i in range(5)]
+    rails = [ax - 3 * pitch, ax - 2 * pitch, ax + 14 * pitch, ax + 15 * pitch]
+
+    frame[int(ay - pitch):int(ay + 30 * pitch), int(ax - 5 * pitch):int(ax + 17 * pitch)] = (230, 225, 210)
+    r = max(1, int(pitch * 0.18))
+    for x in grid + rails:
+        for row in range(30):
+            y = int(ay + row * pitch)
+            frame[y - r:y + r + 1, int(x) - r:int(x) + r + 1] = (40, 40, 40)
+    for x, color in ((ax - 3.6 * pitch, (200, 30, 30)), (ax - 1.4 * pitch, (30, 60, 200)),
+                     (ax + 13.4 * pitch, (30, 60, 200)), (ax + 15.6 * pitch, (200, 30, 30))):
+        frame[int(ay - pitch):int(ay + 30 * pitch), int(x) - r:int(x) + r + 1] = color
+    for row in hidden_rows:
+        y = int(ay + (row - 1) * pitch)
+        frame[y - r:y + r + 1, int(ax - pitch / 2):int(ax + 11.5 * pitch)] = (230, 225, 210)
+    return frame, (ax, ay)
+
+
+def check_synthetic_board():
+    """
+    Run detect_grid on rendered boards with a fractional hole pitch.
+
+    Whole-pixel projection peaks make the row gaps alternate (e.g. 13/14px
+    for a 13.4px pitch), which a median-gap fit turns into a missing or
+    extra row. Checks a 1280x960 board, the same board at 3x, and one with
+    rows hidden under a part, for the a1/a30 positions, row spacing and
+    rail polarity.
+
+    Returns:
+        True if every check passed
+    """
+    checks = []
+
+    def check(name, passed):
+        checks.append(passed)
+        print(f"  {'✓' if passed else '✗'} {name}")
+
+    pitch = 26.72
+    for name, scale, hidden in (("1280x960 board", 1, ()), ("3x board", 3, ()),
+                                ("rows 10-12 hidden", 1, (10, 11, 12))):
+        frame, (ax, ay) = _synthetic_board(1280 * scale, 960 * scale, pitch * scale, hidden)
+        found = detect_grid(frame)
+        if found is None:
+            check(f"{name}: grid found", False)
+            continue
+        tolerance = 0.25 * pitch * scale
+        a1, a30 = found['corners']['a1'], found['corners']['a30']
+        check(f"{name}: a1 and a30 within a quarter pitch",
+              np.hypot(a1[0] - ax, a1[1] - ay) < tolerance
+              and np.hypot(a30[0] - ax, a30[1] - (ay + 29 * pitch * scale)) < tolerance)
+        check(f"{name}: row spacing {found['row_spacing']:.2f}px",
+              abs(found['row_spacing'] - pitch * scale) < 0.02 * pitch * scale)
+        check(f"{name}: rail polarity from stripes",
+              all(found['rails'].get(side, {}).get('positive') == 'outer' for side in 'LR'))
+
+    return all(checks)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if check_synthetic_board() else 1)
@@ -0,0 +1,458 @@
+"""
+Breadboard Netlist Builder
+Groups breadboard holes into electrical nets from detected components.
+
+Every fixed strip of the breadboard is a node of a disjoint-set (union-find)
+structure: one node per row for columns a-e, one per row for f-j, and one per
+power rail (+L, -L, +R, -R). Wires merge the strips under their two legs;
+other components connect two nets without merging them. Building a netlist
+is near-linear in the number of components, and whole circuits are compared
+by a net-level graph signature instead of pairwise are_connected() calls.
+
+For live mode, IncrementalNetlist keeps the nets between frames and applies
+only the components that were added or removed, reporting the nets that
+changed - per-frame cost follows the size of the change, not the board.
+
+Usage:
+    components = roboflow_detections_to_components(output)
+    netlist = build_netlist(components)
+    netlist.same_circuit(build_netlist(expected_components))
+
+    live = IncrementalNetlist()
+    changed = live.update(components)   # {net_id: strips or None}
+"""
+
+import hashlib
+from collections import Counter, deque
+
+LEFT_COLUMNS = ('a', 'b', 'c', 'd', 'e')
+RIGHT_COLUMNS = ('f', 'g', 'h', 'i', 'j')
+RAILS = ('+L', '-L', '+R', '-R')
+
+# Component types that are plain conductors (merge the nets they touch)
+CONDUCTOR_TYPES = {'WIRE'}
+
+# Refinement rounds for the circuit signature (enough for classroom circuits)
+SIGNATURE_ROUNDS = 4
+
+
+def strip_count(num_rows=30):
+    """Number of fixed strips on a breadboard with num_rows rows."""
+    return 2 * num_rows + len(RAILS)
+
+
+def strip_id(row, col, num_rows=30):
+    """
+    Strip index of a breadboard hole.
+
+    Args:
+        row: Row number (1-num_rows); ignored for power rails
+        col: Column letter ('a'-'j') or power rail ('+L', '-L', '+R', '-R')
+
+    Returns:
+        Index in [0, strip_count(num_rows)), or None if not a valid hole
+    """
+    if col in RAILS:
+        return 2 * num_rows + RAILS.index(col)
+    if not row or not 1 <= row <= num_rows:
+        return None
+    if col in LEFT_COLUMNS:
+        return row - 1
+    if col in RIGHT_COLUMNS:
+        return num_rows + row - 1
+    return None
+
+
+def strip_name(strip, num_rows=30):
+    """Readable name of a strip index, e.g. "12a-e", "30f-j", "+L"."""
+    if strip >= 2 * num_rows:
+        return RAILS[strip - 2 * num_rows]
+    if strip >= num_rows:
+        return f"{strip - num_rows + 1}f-j"
+    return f"{strip + 1}a-e"
+
+
+class DisjointSet:
+    """Union-find with path halving and union by rank."""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        """Merge the sets of a and b. Returns the new root."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return root_a
+
+
+class Netlist:
+    """
+    Electrical nets of a breadboard circuit.
+
+    Attributes:
+        strip_net: Net id per strip index (see strip_id)
+        components: List of (type name, net1, net2, source component) for
+            every non-conductor component; a net is None if that leg is not
+            on the board
+        num_rows: Breadboard rows
+    """
+
+    def __init__(self, strip_net, components, num_rows=30):
+        self.strip_net = strip_net
+        self.components = components
+        self.num_rows = num_rows
+
+    @property
+    def num_nets(self):
+        return max(self.strip_net) + 1 if self.strip_net else 0
+
+    def net_of(self, row, col):
+        """Net id of a hole, or None if not a valid hole."""
+        strip = strip_id(row, col, self.num_rows)
+        return None if strip is None else self.strip_net[strip]
+
+    def net_of_position(self, pos):
+        """Net id of a BreadboardPosition or GridMapper position dict."""
+        if pos is None:
+            return None
+        row, col = _position_row_col(pos)
+        return self.net_of(row, col)
+
+    def are_connected(self, pos1, pos2):
+        """Check if two positions are on the same net (wires included)."""
+        net1 = self.net_of_position(pos1)
+        return net1 is not None and net1 == self.net_of_position(pos2)
+
+    def net_members(self, net):
+        """Strip names making up a net."""
+        return [strip_name(strip, self.num_rows)
+                for strip, strip_net in enumerate(self.strip_net) if strip_net == net]
+
+    def used_nets(self):
+        """Net ids touched by at least one (non-conductor) component."""
+        return {net for _, net1, net2, _ in self.components
+                for net in (net1, net2) if net is not None}
+
+    def signature(self):
+        """
+        Canonical label of the circuit's net graph.
+
+        Two netlists with the same components wired the same way have equal
+        signatures, independent of where on the board they were built.
+        Nets are labelled by the power rail polarities they include, so an
+        LED to the + rail differs from one to the - rail. Computed by
+        iterative neighbourhood refinement of the component/net graph.
+        """
+        nets = sorted(self.used_nets())
+        polarity = {net: '' for net in nets}
+        for idx, rail in enumerate(RAILS):
+            net = self.strip_net[2 * self.num_rows + idx]
+            if net in polarity and rail[0] not in polarity[net]:
+                polarity[net] = ''.join(sorted(polarity[net] + rail[0]))
+
+        # Dangling legs get a private net each so they never join anything
+        edges = []
+        dangling = 0
+        for type_name, net1, net2, _ in self.components:
+            legs = []
+            for net in (net1, net2):
+                if net is None:
+                    dangling += 1
+                    net = ('dangling', dangling)
+                    polarity[net] = 'x'
+                legs.append(net)
+            edges.append((type_name, legs))
+
+        net_label = {net: f"net{label}" for net, label in polarity.items()}
+        comp_label = [type_name for type_name, _ in edges]
+
+        for _ in range(SIGNATURE_ROUNDS):
+            net_neighbours = {net: [] for net in net_label}
+            for idx, (_, legs) in enumerate(edges):
+                for net in legs:
+                    net_neighbours[net].append(comp_label[idx])
+
+            comp_label = [_digest(comp_label[idx], sorted(net_label[net] for net in legs))
+                          for idx, (_, legs) in enumerate(edges)]
+            net_label = {net: _digest(label, sorted(net_neighbours[net]))
+                         for net, label in net_label.items()}
+
+        return tuple(sorted(comp_label)), tuple(sorted(net_label.values()))
+
+    def same_circuit(self, other):
+        """Check if another netlist describes the same circuit."""
+        return self.signature() == other.signature()
+
+
+def build_netlist(components, num_rows=30):
+    """
+    Build the netlist of detected components.
+
+    Args:
+        components: DetectedComponent list (from
+            roboflow_detections_to_components) - anything with
+            component_type, position_leg1 and position_leg2
+        num_rows: Breadboard rows
+
+    Returns:
+        Netlist
+    """
+    nets = DisjointSet(strip_count(num_rows))
+    parts = []
+
+    for comp in components:
+        type_name = component_type_name(comp)
+        strip1 = _position_strip(comp.position_leg1, num_rows)
+        strip2 = _position_strip(comp.position_leg2, num_rows)
+
+        if type_name in CONDUCTOR_TYPES:
+            if strip1 is not None and strip2 is not None:
+                nets.union(strip1, strip2)
+            continue
+        parts.append((type_name, strip1, strip2, comp))
+
+    # Renumber roots to compact net ids in strip order
+    net_ids = {}
+    strip_net = []
+    for strip in range(len(nets.parent)):
+        root = nets.find(strip)
+        strip_net.append(net_ids.setdefault(root, len(net_ids)))
+
+    def net(strip):
+        return None if strip is None else strip_net[strip]
+
+    parts = [(type_name, net(strip1), net(strip2), comp)
+             for type_name, strip1, strip2, comp in parts]
+    return Netlist(strip_net, parts, num_rows)
+
+
+class IncrementalNetlist:
+    """
+    Netlist maintained across frames by applying component deltas.
+
+    Components are keyed on (type name, leg1, leg2) with legs as (row, col)
+    - see component_key(). Adding a wire merges two nets (relabelling the
+    smaller one); removing a wire re-walks only the net it belonged to.
+    Net ids are stable while a net is unchanged.
+    """
+
+    def __init__(self, num_rows=30):
+        self.num_rows = num_rows
+        size = strip_count(num_rows)
+
+        self._strip_net = list(range(size))
+        self._net_strips = {strip: {strip} for strip in range(size)}
+        self._next_net = size
+
+        self._wires = [Counter() for _ in range(size)]      # Wire adjacency per strip
+        self._strip_parts = [Counter() for _ in range(size)]  # Part keys per strip
+        self._keys = Counter()                              # Components present
+
+    def update(self, components):
+        """
+        Bring the netlist in line with a frame's full component list.
+
+        Args:
+            components: DetectedComponent list for the current frame
+
+        Returns:
+            Changed nets, as from apply()
+        """
+        keys = Counter(component_key(comp) for comp in components)
+        added = keys - self._keys
+        removed = self._keys - keys
+        return self.apply(added.elements(), removed.elements())
+
+    def apply(self, added=(), removed=()):
+        """
+        Apply component deltas.
+
+        Args:
+            added: Component keys (see component_key) placed on the board
+            removed: Component keys taken off the board
+
+        Returns:
+            Dict of net id -> frozenset of strip names for every net whose
+            strips or attached parts changed; None for nets that no longer
+            exist (merged into another or split up)
+        """
+        changed = set()
+        for key in removed:
+            self._remove(key, changed)
+        for key in added:
+            self._add(key, changed)
+
+        return {net: frozenset(self.net_members(net)) if net in self._net_strips else None
+                for net in changed}
+
+    def net_of(self, row, col):
+        """Net id of a hole, or None if not a valid hole."""
+        strip = strip_id(row, col, self.num_rows)
+        return None if strip is None else self._strip_net[strip]
+
+    def net_members(self, net):
+        """Strip names making up a net."""
+        return [strip_name(strip, self.num_rows) for strip in sorted(self._net_strips[net])]
+
+    def parts_on(self, net):
+        """Keys of the (non-conductor) components touching a net."""
+        parts = Counter()
+        for strip in self._net_strips[net]:
+            parts.update(self._strip_parts[strip])
+        return sorted(parts, key=repr)
+
+    def netlist(self):
+        """Snapshot as a Netlist (for signature comparison)."""
+        net_ids = {}
+        strip_net = [net_ids.setdefault(net, len(net_ids)) for net in self._strip_net]
+
+        parts = []
+        for key, count in self._keys.items():
+            type_name, leg1, leg2 = key
+            if type_name in CONDUCTOR_TYPES:
+                continue
+            nets = [None if leg is None else self.net_of(*leg) for leg in (leg1, leg2)]
+            nets = [None if net is None else net_ids[net] for net in nets]
+            parts.extend([(type_name, nets[0], nets[1], key)] * count)
+
+        return Netlist(strip_net, parts, self.num_rows)
+
+    def _strips(self, key):
+        _, leg1, leg2 = key
+        return [None if leg is None else strip_id(*leg, self.num_rows) for leg in (leg1, leg2)]
+
+    def _add(self, key, changed):
+        self._keys[key] += 1
+        strip1, strip2 = self._strips(key)
+
+        if key[0] not in CONDUCTOR_TYPES:
+            for strip in {strip1, strip2} - {None}:
+                self._strip_parts[strip][key] += 1
+                changed.add(self._strip_net[strip])
+            return
+
+        if strip1 is None or strip2 is None or strip1 == strip2:
+            return
+        self._wires[strip1][strip2] += 1
+        self._wires[strip2][strip1] += 1
+
+        net1, net2 = self._strip_net[strip1], self._strip_net[strip2]
+        if net1 == net2:
+            return
+
+        # Merge the smaller net into the larger one
+        if len(self._net_strips[net1]) < len(self._net_strips[net2]):
+            net1, net2 = net2, net1
+        for strip in self._net_strips[net2]:
+            self._strip_net[strip] = net1
+        self._net_strips[net1] |= self._net_strips.pop(net2)
+        changed.update((net1, net2))
+
+    def _remove(self, key, changed):
+        if self._keys[key] <= 0:
+            return
+        self._keys[key] -= 1
+        if not self._keys[key]:
+            del self._keys[key]
+        strip1, strip2 = self._strips(key)
+
+        if key[0] not in CONDUCTOR_TYPES:
+            for strip in {strip1, strip2} - {None}:
+                parts = self._strip_parts[strip]
+                parts[key] -= 1
+                if not parts[key]:
+                    del parts[key]
+                changed.add(self._strip_net[strip])
+            return
+
+        if strip1 is None or strip2 is None or strip1 == strip2:
+            return
+        for a, b in ((strip1, strip2), (strip2, strip1)):
+            self._wires[a][b] -= 1
+            if not self._wires[a][b]:
+                del self._wires[a][b]
+        if self._wires[strip1][strip2]:
+            return  # A parallel wire still joins them
+
+        # Walk the remaining wires from one end; split if the other is cut off
+        reached = {strip1}
+        queue = deque([strip1])
+        while queue:
+            for neighbour in self._wires[queue.popleft()]:
+                if neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+        if strip2 in reached:
+            return
+
+        old_net = self._strip_net[strip1]
+        new_net = self._next_net
+        self._next_net += 1
+        self._net_strips[old_net] -= reached
+        self._net_strips[new_net] = reached
+        for strip in reached:
+            self._strip_net[strip] = new_net
+        changed.update((old_net, new_net))
+
+
+def component_key(comp):
+    """
+    Identity of a detected component: (type name, leg1, leg2).
+
+    Legs are (row, col) tuples, or None when missing / off the board, in a
+    canonical order so a part detected with its legs swapped keeps its key.
+    """
+    legs = []
+    for pos in (comp.position_leg1, comp.position_leg2):
+        row, col = (None, None) if pos is None else _position_row_col(pos)
+        legs.append(None if col is None else (row, col))
+    return legs_key(component_type_name(comp), legs[0], legs[1])
+
+
+def legs_key(type_name, leg1, leg2):
+    """component_key() from a type name and two (row, col) legs (or None)."""
+    legs = sorted((leg1, leg2), key=lambda leg: (leg is None, leg or (0, '')))
+    return (type_name, legs[0], legs[1])
+
+
+def component_type_name(comp):
+    """Upper-case type name of a component ('LED', 'WIRE', ...)."""
+    comp_type = comp.component_type
+    return str(getattr(comp_type, 'name', comp_type)).upper()
+
+
+def _position_row_col(pos):
+    """(row, col) of a BreadboardPosition or GridMapper position dict."""
+    if isinstance(pos, dict):
+        if not pos.get('valid', True):
+            return None, None
+        return pos.get('row'), pos.get('col')
+    return pos.row, pos.column
+
+
+def _position_strip(pos, num_rows):
+    """Strip index of a position, or None if missing / off the board."""
+    if pos is None:
+        return None
+    row, col = _position_row_col(pos)
+    return strip_id(row, col, num_rows)
+
+
+def _digest(label, neighbours):
+    """Short stable hash of a node label and its neighbours' labels."""
+    text = label + '|' + ','.join(neighbours)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
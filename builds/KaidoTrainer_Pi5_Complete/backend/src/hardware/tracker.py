@@ -0,0 +1,302 @@
+"""
+Temporal Component Tracker
+Stabilizes live detections across frames before they reach validation.
+
+Each frame's detections are associated with existing tracks by class-aware
+box IoU, or by landing on the same holes as the track. Tracks keep a
+persistent id. The leg positions a track reports are a majority vote over
+its last few frames, so a leg that jumps a row for one frame changes
+nothing. A new part is reported only after it has been seen in
+confirm_frames consecutive frames. A confirmed part is only removed after
+it has been missing for drop_frames frames in a row.
+
+update() returns just the confirmed changes (added / moved / removed), so
+downstream work - netlist updates, re-validation, hints - follows real
+changes instead of detector flicker.
+
+Usage:
+    tracker = ComponentTracker(get_grid_mapper())
+    live = IncrementalNetlist()
+
+    events = tracker.update(model.detect(frame))
+    if events:
+        added, removed = netlist_changes(events)
+        live.apply(added, removed)
+"""
+
+from collections import Counter, deque
+
+import numpy as np
+
+from .grid_mapper import COLUMN_NAMES
+from .netlist import legs_key
+from .roboflow_model import NAME_TO_COMPONENT, DetectionBatch, box_iou
+
+# Event kinds
+ADDED = 'added'
+MOVED = 'moved'
+REMOVED = 'removed'
+
+
+class TrackEvent:
+    """
+    A confirmed change to the set of parts on the board.
+
+    Legs are (row, col) tuples like (12, 'e') or (3, '+L'), leg2 None for
+    single-position parts. For MOVED events previous_legs holds the legs
+    reported before.
+    """
+    __slots__ = ('kind', 'track_id', 'type_name', 'legs', 'previous_legs', 'confidence', 'bbox')
+
+    def __init__(self, kind, track, legs, previous_legs=None):
+        self.kind = kind
+        self.track_id = track.id
+        self.type_name = track.type_name
+        self.legs = legs
+        self.previous_legs = previous_legs
+        self.confidence = track.confidence
+        self.bbox = track.bbox
+
+    @property
+    def key(self):
+        """Netlist component key (see netlist.component_key) of the part."""
+        return legs_key(self.type_name, *self.legs)
+
+    @property
+    def previous_key(self):
+        """Component key before a move, None for other events."""
+        if self.previous_legs is None:
+            return None
+        return legs_key(self.type_name, *self.previous_legs)
+
+    def to_component(self):
+        """The part as a DetectedComponent (as roboflow_detections_to_components builds)."""
+        from ..models.components import ComponentType, DetectedComponent, BreadboardPosition
+
+        pos1, pos2 = (None if leg is None else BreadboardPosition(row=leg[0], column=leg[1])
+                      for leg in self.legs)
+        x1, y1, x2, y2 = self.bbox
+        return DetectedComponent(
+            component_type=ComponentType[self.type_name],
+            position_leg1=pos1,
+            position_leg2=pos2,
+            confidence=self.confidence,
+            bounding_box=(x1, y1, x2 - x1, y2 - y1),
+        )
+
+    def __repr__(self):
+        return f"TrackEvent({self.kind}, id={self.track_id}, {self.type_name}, legs={self.legs})"
+
+
+class Track:
+    """One part followed across frames."""
+
+    def __init__(self, track_id, type_name, bbox, confidence, legs, window):
+        self.id = track_id
+        self.type_name = type_name
+        self.bbox = bbox
+        self.confidence = confidence
+        self.history = deque([legs], maxlen=window)  # Leg positions per matched frame
+        self.hits = 1            # Consecutive frames matched
+        self.misses = 0          # Consecutive frames missed
+        self.confirmed = False
+        self.reported = None     # Legs last reported downstream (None = not on board)
+        self.voted = legs
+
+    def observe(self, bbox, confidence, legs):
+        """Matched in this frame."""
+        self.bbox = bbox
+        self.confidence = confidence
+        self.history.append(legs)
+        self.hits += 1
+        self.misses = 0
+        self.voted = self._vote()
+
+    def _vote(self):
+        """Majority leg positions over the window; ties keep the current vote."""
+        counts = Counter(self.history)
+        best = max(counts.values())
+        if counts.get(self.voted, 0) == best:
+            return self.voted
+        for legs in reversed(self.history):
+            if counts[legs] == best:
+                return legs
+
+
+class ComponentTracker:
+    """
+    Associates detections with persistent tracks and reports confirmed changes.
+
+    Args:
+        mapper: GridMapper used to place legs on the board
+        window: Frames in the leg-position majority vote
+        confirm_frames: Consecutive sightings before a part is reported
+        drop_frames: Consecutive misses before a confirmed part is removed
+        iou_threshold: Minimum box IoU to continue a track
+        min_confidence: Detections below this are ignored
+    """
+
+    def __init__(self, mapper, window=5, confirm_frames=3, drop_frames=3,
+                 iou_threshold=0.3, min_confidence=0.5):
+        self.mapper = mapper
+        self.window = window
+        self.confirm_frames = confirm_frames
+        self.drop_frames = drop_frames
+        self.iou_threshold = iou_threshold
+        self.min_confidence = min_confidence
+
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, output):
+        """
+        Advance the tracker by one frame.
+
+        Args:
+            output: ModelOutput of the frame
+
+        Returns:
+            List of TrackEvent for confirmed changes (usually empty)
+        """
+        detections = output.detections
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_detections(detections)
+        detections = detections[detections.confidence >= self.min_confidence]
+
+        # Only parts the rest of the pipeline understands
+        type_names = np.array([NAME_TO_COMPONENT.get(name.lower(), '')
+                               for name in detections.class_name_array()], dtype=object)
+        detections = detections[type_names != '']
+        type_names = type_names[type_names != '']
+
+        legs = self._legs(detections)
+        matches = self._associate(detections, type_names, legs)
+
+        events = []
+        matched = set()
+        for track_idx, det_idx in matches:
+            track = self.tracks[track_idx]
+            track.observe(tuple(detections.bbox[det_idx].tolist()),
+                          float(detections.confidence[det_idx]), legs[det_idx])
+            matched.add(track_idx)
+            if not track.confirmed and track.hits >= self.confirm_frames:
+                track.confirmed = True
+            if track.confirmed:
+                self._sync(track, events)
+
+        survivors = []
+        for idx, track in enumerate(self.tracks):
+            if idx not in matched:
+                track.misses += 1
+                track.hits = 0
+                if not track.confirmed:
+                    continue  # Tentative tracks die on the first miss
+                if track.misses >= self.drop_frames:
+                    if track.reported is not None:
+                        events.append(TrackEvent(REMOVED, track, track.reported))
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        new = np.setdiff1d(np.arange(len(detections)), [d for _, d in matches])
+        for det_idx in new:
+            track = Track(self._next_id, type_names[det_idx],
+                          tuple(detections.bbox[det_idx].tolist()),
+                          float(detections.confidence[det_idx]), legs[det_idx], self.window)
+            self._next_id += 1
+            if self.confirm_frames <= 1:
+                track.confirmed = True
+                self._sync(track, events)
+            self.tracks.append(track)
+
+        return events
+
+    def confirmed(self):
+        """Confirmed tracks currently on the board."""
+        return [track for track in self.tracks if track.reported is not None]
+
+    def reset(self):
+        """Forget all tracks (e.g. after recalibration)."""
+        self.tracks = []
+
+    def _legs(self, detections):
+        """(leg1, leg2) per detection, legs as (row, col) or None."""
+        mapped = self.mapper.map_components_batch(detections.centers)
+        result = []
+        for record in mapped:
+            leg1 = _leg(record['leg1'])
+            leg2 = _leg(record['leg2']) if record['has_leg2'] else None
+            result.append((leg1, leg2))
+        return result
+
+    def _associate(self, detections, type_names, legs):
+        """Greedy one-to-one matching of tracks to detections, best score first."""
+        if not self.tracks or len(detections) == 0:
+            return []
+
+        track_boxes = np.array([track.bbox for track in self.tracks], dtype=np.float32)
+        score = box_iou(track_boxes, detections.bbox)
+
+        # Same holes as the track's vote counts as a perfect overlap
+        for t, track in enumerate(self.tracks):
+            voted = set((track.voted, track.voted[::-1]))
+            for d, det_legs in enumerate(legs):
+                if det_legs[0] is not None and det_legs in voted:
+                    score[t, d] = 1.0
+
+        track_types = np.array([track.type_name for track in self.tracks], dtype=object)
+        score[track_types[:, None] != type_names[None, :]] = 0
+
+        pairs = np.argwhere(score >= self.iou_threshold)
+        pairs = pairs[np.argsort(-score[pairs[:, 0], pairs[:, 1]], kind='stable')]
+
+        matches = []
+        used_tracks, used_dets = set(), set()
+        for t, d in pairs.tolist():
+            if t not in used_tracks and d not in used_dets:
+                used_tracks.add(t)
+                used_dets.add(d)
+                matches.append((t, d))
+        return matches
+
+    def _sync(self, track, events):
+        """Report a confirmed track's voted legs if they differ from the last report."""
+        legs = track.voted if track.voted[0] is not None else None
+        if legs == track.reported:
+            return
+        if track.reported is None:
+            events.append(TrackEvent(ADDED, track, legs))
+        elif legs is None:
+            events.append(TrackEvent(REMOVED, track, track.reported))
+        else:
+            events.append(TrackEvent(MOVED, track, legs, track.reported))
+        track.reported = legs
+
+
+def netlist_changes(events):
+    """
+    Component keys to add and remove for IncrementalNetlist.apply().
+
+    Args:
+        events: TrackEvent list from ComponentTracker.update()
+
+    Returns:
+        (added_keys, removed_keys)
+    """
+    added, removed = [], []
+    for event in events:
+        if event.kind == ADDED:
+            added.append(event.key)
+        elif event.kind == REMOVED:
+            removed.append(event.key)
+        else:
+            removed.append(event.previous_key)
+            added.append(event.key)
+    return added, removed
+
+
+def _leg(point):
+    """(row, col name) of a GRID_POINT_DTYPE record, None if off the board."""
+    if not point['valid']:
+        return None
+    return (int(point['row']), COLUMN_NAMES[point['col']])